@@ -1,15 +1,46 @@
 #! /usr/bin/env python3
 
+from collections import deque
+from datetime import datetime
+from typing import TextIO
+
 import click
+from pydantic import ValidationError
 
+from register.checkpoint import (
+    CHECKPOINT_WINDOW,
+    append_workbook_data,
+    make_checkpoint,
+    save_checkpoint,
+    track_tail,
+)
+from register.database import current_db_path
+from register.documents import migrate_documents as move_documents
+from register.export import (
+    EXPORT_FORMATS,
+    export_fixed_assets,
+    select_export_fields,
+)
 from register.functions import (
-    generate_fixed_asset_document,
+    generate_fixed_asset_documents,
     get_app_settings,
     load_fixed_assets,
     print_fixed_assets,
     process_workbook_data,
+    select_document_indices,
 )
-from register.workbook import read_workbook_data
+from register.helpers import exit_with_info
+from register.models import AppSettings
+from register.pipeline import import_pipelined
+from register.snapshots import diff_snapshots, list_snapshots
+from register.workbook import (
+    iter_csv_data,
+    iter_workbook_data,
+    read_csv_data,
+    read_workbook_data,
+)
+
+DATE_FORMATS = ['%d-%m-%Y', '%Y-%m-%d']
 
 @click.group(invoke_without_command=True)
 @click.pass_context
@@ -22,12 +53,90 @@ def cli(ctx):
         report()
 
 @cli.command()
-def import_wb() -> None:
+@click.option('--processes', default=1, show_default=True)
+@click.option('--collect-errors', is_flag=True)
+@click.option('--pipeline', is_flag=True)
+@click.option('--append', is_flag=True)
+@click.option('--csv', 'csv_filename', type=click.Path(dir_okay=False))
+@click.option('--delimiter', default=None)
+@click.option('--encoding', default='utf-8-sig', show_default=True)
+def import_wb(
+        processes: int = 1,
+        collect_errors: bool = False,
+        pipeline: bool = False,
+        append: bool = False,
+        csv_filename: str | None = None,
+        delimiter: str | None = None,
+        encoding: str = 'utf-8-sig',
+    ) -> None:
     """
     Imports workbook data to a simple DB (pickle)
+
+    Parameters: --processes (int).
+    Number of processes validating the rows, 0 means one per CPU.
+
+    --collect-errors (bool).
+    If True, validates the whole sheet and reports all the errors at once
+    in import_errors.txt and import_errors.json instead of stopping
+    at the first one.
+
+    --pipeline (bool).
+    If True, reads, validates and writes the data at the same time.
+
+    --append (bool).
+    If True, imports only the rows added below the ones imported last time.
+    Falls back to importing all rows if the last imported ones changed.
+
+    --csv (str).
+    Imports the sheet exported to a CSV/TSV file instead of the workbook.
+    --delimiter (str) - a tab for .tsv files and a comma otherwise
+    by default, --encoding (str) - the encoding of the file.
     """
-    workbook_data = read_workbook_data()
-    process_workbook_data(workbook_data)
+    if csv_filename:
+        if append:
+            exit_with_info('Only rows of the workbook can be appended.')
+        if delimiter == '\\t':
+            delimiter = '\t'
+        if pipeline:
+            import_pipelined(
+                iter_csv_data(csv_filename, delimiter, encoding),
+                processes,
+                collect_errors,
+            )
+        else:
+            try:
+                workbook_data = read_csv_data(
+                    csv_filename, delimiter, encoding
+                )
+            except RuntimeError as e:
+                exit_with_info(f'Error: {e}')
+            process_workbook_data(workbook_data, processes, collect_errors)
+        return
+
+    if append:
+        reason = append_workbook_data(processes, collect_errors)
+        if reason is None:
+            return
+        print(f'{reason} Importing all rows.')
+
+    tail = deque(maxlen=CHECKPOINT_WINDOW)
+
+    def save_import_checkpoint(db_version: str) -> None:
+        # saved holding the DB lock, so it is the version of this import
+        save_checkpoint(make_checkpoint(tail, AppSettings(), db_version))
+
+    if pipeline:
+        import_pipelined(
+            track_tail(iter_workbook_data(), tail),
+            processes,
+            collect_errors,
+            save_import_checkpoint,
+        )
+    else:
+        workbook_data = list(track_tail(read_workbook_data(), tail))
+        process_workbook_data(
+            workbook_data, processes, collect_errors, save_import_checkpoint
+        )
 
 @cli.command()
 @click.option('--gdpr', is_flag=True)
@@ -43,17 +152,153 @@ def report(gdpr: bool = False) -> None:
     print_fixed_assets(fixed_assets, gdpr)
 
 @cli.command()
-@click.argument('serial')
-def create_document(serial: str) -> None:
+@click.argument('filename')
+@click.option(
+    '--format', 'export_format',
+    type=click.Choice(EXPORT_FORMATS),
+    default='csv',
+    show_default=True,
+)
+@click.option('--fields', default=None)
+@click.option('--gzip', 'compress', is_flag=True)
+@click.option('--gdpr', is_flag=True)
+def export(
+        filename: str,
+        export_format: str = 'csv',
+        fields: str | None = None,
+        compress: bool = False,
+        gdpr: bool = False,
+    ) -> None:
     """
-    Makes the fixed asset document (Excel file) based on the passed serial.
+    Exports all data in the DB to a CSV or JSON Lines file.
+
+    Parameters: filename (str), --format (csv or jsonl),
+    --fields (str) - comma separated names of the fields to export,
+    --gzip (bool) - compresses the file,
+    --gdpr (bool) - hides material duty person.
+    """
+    try:
+        selected_fields = select_export_fields(fields)
+    except ValueError as e:
+        exit_with_info(f'Error: {e}')
+    fixed_assets = load_fixed_assets()
+    count = export_fixed_assets(
+        fixed_assets,
+        filename,
+        export_format,
+        selected_fields,
+        gdpr,
+        compress,
+    )
+    print(f'{count} fixed assets exported to {filename}.')
+
+@cli.command()
+@click.argument('old', required=False)
+@click.argument('new', required=False)
+def diff(old: str | None = None, new: str | None = None) -> None:
+    """
+    Lists assets added (+), removed (-) and modified (~) between two imports.
+
+    Parameters: old, new (str) - ids of the snapshots to compare.
+    By default the last two imports are compared, pass just 'old'
+    to compare it with the last one. Run w/o snapshots in the store
+    to see what the ids are.
+    """
+    snapshots = list_snapshots()
+    if len(snapshots) < 2 and not (old and new):
+        exit_with_info(
+            'At least two imports are needed to compare them, found: '
+            + (', '.join(snapshots) or 'none')
+        )
+    old = old or snapshots[-2]
+    new = new or snapshots[-1]
+    try:
+        added, removed, modified = diff_snapshots(old, new)
+    except RuntimeError as e:
+        exit_with_info(f'Error: {e}')
+
+    print(f'Changes from {old} to {new}:')
+    for sign, keys in (('+', added), ('-', removed), ('~', modified)):
+        for key in keys:
+            print(f'{sign} {key}')
+
+@cli.command()
+@click.argument('serials', nargs=-1)
+@click.option('--all', 'all_documents', is_flag=True)
+@click.option('--from-file', type=click.File(encoding='utf-8'))
+@click.option('--unit', 'units', multiple=True)
+@click.option('--cost-center', 'cost_centers', multiple=True)
+@click.option('--date-from', type=click.DateTime(DATE_FORMATS))
+@click.option('--date-to', type=click.DateTime(DATE_FORMATS))
+@click.option('--processes', default=0, show_default=True)
+def create_document(
+        serials: tuple[str, ...] = (),
+        all_documents: bool = False,
+        from_file: TextIO | None = None,
+        units: tuple[str, ...] = (),
+        cost_centers: tuple[str, ...] = (),
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        processes: int = 0,
+    ) -> None:
+    """
+    Makes the fixed asset documents (Excel files) of the passed serials
+    and/or the ones matching the filters, all of them in one go.
 
     Parameters:
-    serial (str): Serial number of the fixed asset.
-    Pass '--all' to generate all documents.
+    serials (str): Serial numbers of the fixed assets.
+    --all (bool): Makes the documents of all fixed assets.
+    --from-file (file): Reads the serials from the file, one per line.
+    --unit, --cost-center (str): Only the fixed assets of the unit
+    or cost center, may be repeated.
+    --date-from, --date-to (DD-MM-YYYY): Only the fixed assets dated
+    within the range.
+    --processes (int): Number of processes making the documents,
+    0 means one per CPU.
+    """
+    if '--all' in serials:
+        all_documents, serials = True, ()
+    if from_file is not None:
+        serials += tuple(
+            line.strip() for line in from_file
+            if line.strip() and not line.startswith('#')
+        )
+    filters = units or cost_centers or date_from or date_to
+    if not (serials or all_documents or filters):
+        exit_with_info('Pass the serials, --all or the filters.')
+
+    db_path = current_db_path()
+    fixed_assets = load_fixed_assets(db_path)
+    indices, missing = select_document_indices(
+        fixed_assets,
+        serials if serials else None,
+        units,
+        cost_centers,
+        date_from,
+        date_to,
+    )
+    if missing:
+        print('Not found in the DB: ' + ', '.join(sorted(missing)))
+    generate_fixed_asset_documents(indices, db_path, processes)
+    print(f'{len(indices)} documents made.')
+
+@cli.command()
+def migrate_documents() -> None:
+    """
+    Moves the fixed asset documents already made to the directories
+    of the layout set in the settings (fa_layout, fa_shards)
+    and rebuilds their index.
     """
+    try:
+        app_settings = AppSettings()
+    except ValidationError as e:
+        exit_with_info(f'Error: {e}')
     fixed_assets = load_fixed_assets()
-    generate_fixed_asset_document(fixed_assets, serial)
+    try:
+        moved = move_documents(fixed_assets, app_settings)
+    except RuntimeError as e:
+        exit_with_info(f'Error: {e}')
+    print(f'{moved} documents moved to the {app_settings.fa_layout} layout.')
 
 @cli.command()
 def search(item: str) -> None:
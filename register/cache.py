@@ -0,0 +1,186 @@
+"""
+Local cache of the source workbook. The register often lives on a network
+share, so the workbook is copied to a local directory once and opened from
+there until the source changes.
+
+The rows read from the workbook are cached too, in a sidecar file keyed
+by everything they depend on, so an unchanged workbook is not parsed again.
+
+The rows are pickled, so the cache lives in a directory of the user's own,
+never in the shared temporary one, and is not used if someone else owns it.
+"""
+
+from hashlib import blake2b
+from json import dump, load
+from os import environ, getpid, replace, stat
+from pathlib import Path
+from pickle import HIGHEST_PROTOCOL, UnpicklingError, dump as pickle_dump
+from pickle import load as pickle_load
+from stat import S_ISDIR
+from typing import Any
+
+try:
+    from os import getuid
+except ImportError:  # Windows, where the home directory is the user's own
+    getuid = None
+
+
+CACHE_DIR = (
+    Path(environ.get('XDG_CACHE_HOME') or Path.home() / '.cache')
+    / 'fixed_assets_register'
+)
+BLOCK_SIZE = 1 << 20
+ROWS_CHUNK = 1000
+
+
+def file_checksum(filename: Path) -> str:
+    checksum = blake2b(digest_size=16)
+    with open(filename, 'rb') as stream:
+        while block := stream.read(BLOCK_SIZE):
+            checksum.update(block)
+    return checksum.hexdigest()
+
+def cache_dir() -> Path:
+    """
+    Returns CACHE_DIR, creating it first, private to the user.
+
+    Raises:
+    PermissionError: If it is not a directory owned by the user.
+    """
+    CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    cache_stat = CACHE_DIR.lstat()
+    if not S_ISDIR(cache_stat.st_mode) or (
+        getuid is not None and cache_stat.st_uid != getuid()
+    ):
+        raise PermissionError(f'{CACHE_DIR} is not a directory of your own.')
+    return CACHE_DIR
+
+def cache_name(filename: str | Path) -> str:
+    """
+    Returns the name the given file is cached under, the same for every
+    path pointing to it.
+    """
+    source = str(Path(filename).resolve())
+    return blake2b(source.encode('utf-8'), digest_size=8).hexdigest()
+
+def _copy(source: Path, target: Path) -> str:
+    """
+    Copies the file, reading it only once, and returns the checksum
+    of the copy. The copy is renamed into place when complete.
+    """
+    checksum = blake2b(digest_size=16)
+    temporary = target.with_name(f'{target.name}.{getpid()}.tmp')
+    with open(source, 'rb') as reader, open(temporary, 'wb') as writer:
+        while block := reader.read(BLOCK_SIZE):
+            checksum.update(block)
+            writer.write(block)
+    replace(temporary, target)
+    return checksum.hexdigest()
+
+def cached_workbook(filename: str | Path) -> Path:
+    """
+    Returns the path of the local copy of the workbook, copying it first
+    if the source changed (its size or mtime differ from the copied one)
+    or the copy does not match its checksum. Only the metadata of the
+    source is read otherwise.
+
+    Raises:
+    FileNotFoundError: If the source does not exist.
+    OSError: If the workbook cannot be copied, e.g. CACHE_DIR is not
+    the user's own, see cache_dir.
+    """
+    source = Path(filename)
+    source_stat = stat(source)
+    directory = cache_dir()
+    name = cache_name(source)
+    copy = directory / f'{name}{source.suffix}'
+    metadata_file = directory / f'{name}.json'
+
+    try:
+        with open(metadata_file, encoding='utf-8') as stream:
+            metadata = load(stream)
+        if (metadata['size'] == source_stat.st_size
+            and metadata['mtime_ns'] == source_stat.st_mtime_ns
+            and copy.stat().st_size == source_stat.st_size
+            and file_checksum(copy) == metadata['checksum']):
+            return copy
+    except (OSError, ValueError, KeyError):
+        pass
+
+    metadata = {
+        'source': str(source.resolve()),
+        'size': source_stat.st_size,
+        'mtime_ns': source_stat.st_mtime_ns,
+        'checksum': _copy(source, copy),
+    }
+    with open(metadata_file, 'w', encoding='utf-8') as stream:
+        dump(metadata, stream, indent=2)
+    return copy
+
+def rows_cache_key(
+        filename: str | Path,
+        sheetname: str | None,
+        last_column: int | None,
+        layout: dict[str, int],
+    ) -> dict[str, Any]:
+    """
+    Returns the key of the rows read from the given sheet of the workbook.
+    Only the metadata of the workbook is read.
+
+    Parameters:
+    layout (dict): How the rows were remapped, i.e. INDEXES.
+    """
+    source = Path(filename)
+    source_stat = stat(source)
+    return {
+        'source': str(source.resolve()),
+        'size': source_stat.st_size,
+        'mtime_ns': source_stat.st_mtime_ns,
+        'sheetname': sheetname,
+        'last_column': last_column,
+        'layout': list(layout.items()),
+    }
+
+def _rows_cache_file(key: dict[str, Any]) -> Path:
+    return cache_dir() / f'{cache_name(key["source"])}.rows'
+
+def load_cached_rows(key: dict[str, Any]) -> list[tuple] | None:
+    """
+    Returns the rows cached under the key, None if there are none.
+    """
+    try:
+        with open(_rows_cache_file(key), 'rb') as stream:
+            cached_key = pickle_load(stream)
+            if cached_key != key:
+                return None
+            rows = []
+            while chunk := pickle_load(stream):
+                rows.extend(chunk)
+            return rows
+    except (OSError, EOFError, UnpicklingError):
+        return None
+
+def save_cached_rows(key: dict[str, Any], rows: list[tuple]) -> None:
+    """
+    Stores the rows, replacing the ones cached for the workbook before.
+    The rows are stored in chunks, the last one being empty.
+    Failing to do so is not an error, it is just a cache.
+    """
+    try:
+        filename = _rows_cache_file(key)
+    except OSError:
+        return
+    temporary = filename.with_name(f'{filename.name}.{getpid()}.tmp')
+    try:
+        with open(temporary, 'wb') as stream:
+            pickle_dump(key, stream, HIGHEST_PROTOCOL)
+            # pickled in chunks, as the pickler remembers every object
+            # it dumped, which would double the memory used by the rows
+            for start in range(0, len(rows), ROWS_CHUNK):
+                pickle_dump(
+                    rows[start:start + ROWS_CHUNK], stream, HIGHEST_PROTOCOL
+                )
+            pickle_dump([], stream, HIGHEST_PROTOCOL)
+        replace(temporary, filename)
+    except OSError:
+        temporary.unlink(missing_ok=True)
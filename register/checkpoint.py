@@ -0,0 +1,167 @@
+"""
+Checkpointed import of the rows appended to the workbook since the last one.
+
+After every import the checkpoint records the last row with data, its
+ordinal number and a checksum of the trailing CHECKPOINT_WINDOW rows.
+An '--append' import starts reading the sheet at the window, and if its
+checksum still matches, validates only the rows below it. openpyxl still
+scans the sheet up to the window, but no rows above it are built or
+validated. Rows changed above the window go unnoticed, so a full import
+is needed now and then.
+"""
+
+from collections import deque
+from hashlib import blake2b
+from itertools import islice
+from json import dump, load
+from os import replace
+from typing import Any, Generator, Iterable
+
+from .database import current_db_path, publish_db, writer_lock
+from .functions import (
+    ORDINAL_NUMBER,
+    load_fixed_assets,
+    select_fixed_asset_documents,
+)
+from .helpers import exit_with_info
+from .models import AppSettings
+from .snapshots import save_snapshot
+from .workbook import get_workbook, get_workbook_settings, process_rows
+
+
+CHECKPOINT_FILE = 'import_checkpoint.json'
+CHECKPOINT_WINDOW = 20
+FIRST_DATA_ROW = 2
+
+
+def rows_checksum(rows: Iterable[tuple]) -> str:
+    checksum = blake2b(digest_size=16)
+    for row in rows:
+        checksum.update(repr(row).encode('utf-8'))
+    return checksum.hexdigest()
+
+def track_tail(
+        rows: Iterable[tuple],
+        tail: deque,
+        start: int = FIRST_DATA_ROW,
+    ) -> Generator[tuple, None, None]:
+    """
+    Passes the rows through, keeping the trailing rows (with their numbers
+    in the sheet) which end at the last row with data in the tail.
+    Empty rows below it are not kept.
+
+    Parameters:
+    rows (iterable of tuples laid out as ROW_LAYOUT).
+    tail (deque): Where the trailing rows are kept, its maxlen is the window.
+    start (int): Number of the first row in the sheet.
+    """
+    empty = deque(maxlen=tail.maxlen)
+    for number, row in enumerate(rows, start):
+        if all(value is None for value in row):
+            empty.append((number, row))
+        else:
+            tail.extend(empty)
+            empty.clear()
+            tail.append((number, row))
+        yield row
+
+def make_checkpoint(
+        tail: deque, app_settings: AppSettings, db_version: str
+    ) -> dict[str, Any]:
+    """
+    Parameters:
+    tail (deque): The trailing rows, see track_tail.
+    app_settings (AppSettings): The settings of the imported workbook.
+    db_version (str): The name of the DB version the rows were imported to.
+    """
+    return {
+        'workbook': app_settings.wb_filename,
+        'sheetname': app_settings.sheetname,
+        'last_column': app_settings.last_column,
+        'db_version': db_version,
+        'row': tail[-1][0] if tail else FIRST_DATA_ROW - 1,
+        'ordinal_number': tail[-1][1][ORDINAL_NUMBER] if tail else None,
+        'window': len(tail),
+        'checksum': rows_checksum(row for _, row in tail),
+    }
+
+def save_checkpoint(checkpoint: dict[str, Any]) -> None:
+    with open(f'{CHECKPOINT_FILE}.tmp', 'w', encoding='utf-8') as stream:
+        dump(checkpoint, stream, default=str, indent=2)
+    replace(f'{CHECKPOINT_FILE}.tmp', CHECKPOINT_FILE)
+
+def load_checkpoint() -> dict[str, Any] | None:
+    try:
+        with open(CHECKPOINT_FILE, encoding='utf-8') as stream:
+            return load(stream)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def append_workbook_data(
+        processes: int = 1, collect_errors: bool = False
+    ) -> str | None:
+    """
+    Imports the rows appended below the checkpoint, adding their documents
+    to the DB, and moves the checkpoint to the new last row.
+
+    Returns:
+    str: Why the rows cannot be appended, so a full import is needed,
+    e.g. the trailing window changed. None if the rows were appended.
+    """
+    checkpoint = load_checkpoint()
+    app_settings = get_workbook_settings()
+    if checkpoint is None:
+        return 'There is no checkpoint of the last import.'
+    if (
+        checkpoint['workbook'], checkpoint['sheetname'],
+        checkpoint['last_column'],
+    ) != (
+        app_settings.wb_filename, app_settings.sheetname,
+        app_settings.last_column,
+    ):
+        return 'The last import was of another workbook, sheet or columns.'
+    if checkpoint['db_version'] != current_db_path().name:
+        return 'The DB was published by another import since the last one.'
+
+    last_row, window = checkpoint['row'], checkpoint['window']
+    workbook = get_workbook(app_settings.wb_filename)
+    try:
+        rows = process_rows(
+            workbook[app_settings.sheetname].iter_rows(
+                last_row - window + 1,
+                max_col=app_settings.last_column,
+                values_only=True,
+            )
+        )
+        trailing_rows = list(islice(rows, window))
+        if (len(trailing_rows) != window
+            or rows_checksum(trailing_rows) != checkpoint['checksum']):
+            return 'The last rows imported changed since.'
+
+        tail = deque(
+            zip(range(last_row - window + 1, last_row + 1), trailing_rows),
+            maxlen=CHECKPOINT_WINDOW,
+        )
+        appended_rows = list(track_tail(rows, tail, last_row + 1))
+    finally:
+        workbook.close()
+
+    appended = select_fixed_asset_documents(
+        appended_rows, processes, collect_errors, last_row
+    )
+    try:
+        with writer_lock():
+            # another import may have published meanwhile,
+            # its documents would be lost if appended to the older ones
+            if current_db_path().name != checkpoint['db_version']:
+                return 'The DB was published by another import meanwhile.'
+            db_version = checkpoint['db_version']
+            if appended:
+                fixed_asset_documents = load_fixed_assets() + appended
+                db_version = publish_db(fixed_asset_documents)
+                save_snapshot(fixed_asset_documents)
+            save_checkpoint(make_checkpoint(tail, app_settings, db_version))
+    except RuntimeError as e:
+        exit_with_info(f'Error: {e}')
+    print(f'{len(appended)} fixed assets appended.')
+    return None
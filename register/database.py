@@ -0,0 +1,222 @@
+"""
+The pickle DB shared by many users, e.g. on a network drive.
+
+Every import publishes a new, immutable version of the DB:
+
+fixed_assets.db.d/
+    000041.db
+    000041.db.parts
+    000042.db               pickled lists of up to PART_SIZE items each
+    000042.db.parts         (offset, count) of every part of 000042.db
+fixed_assets.db.current     the name of the current version, i.e. 000042.db
+fixed_assets.db.lock        held by the import currently writing
+
+A version is written to a temporary file and renamed, then the pointer
+is replaced the same way, so readers never see a half-written file
+and never wait for a writer. Writers wait for each other on the lock.
+With the table of parts, a reader may seek to the items it needs
+and unpickle only the parts holding them.
+"""
+
+from contextlib import contextmanager
+from json import dump as json_dump, load as json_load
+from os import O_CREAT, O_EXCL, O_WRONLY, close, fsync, getpid, open as os_open
+from os import replace, write
+from pathlib import Path
+from pickle import HIGHEST_PROTOCOL, dump, load
+from time import monotonic, sleep
+from typing import BinaryIO, Callable, ContextManager, Generator
+
+
+FILE_DB = 'fixed_assets.db'
+DB_VERSIONS = f'{FILE_DB}.d'
+DB_POINTER = f'{FILE_DB}.current'
+DB_LOCK = f'{FILE_DB}.lock'
+KEEP_VERSIONS = 3
+LOCK_TIMEOUT = 300
+RETRIES = 5
+PART_SIZE = 1000
+
+
+def current_db_path() -> Path:
+    """
+    Returns the path of the current DB version, or FILE_DB if nothing
+    has been published yet (a DB written by an older version of the app).
+    """
+    for _ in range(RETRIES):
+        try:
+            version = Path(DB_POINTER).read_text(encoding='utf-8').strip()
+        except FileNotFoundError:
+            return Path(FILE_DB)
+        except PermissionError:
+            # Windows does not let us read the pointer while it is replaced
+            sleep(0.1)
+            continue
+        return Path(DB_VERSIONS) / version
+    raise FileNotFoundError(DB_POINTER)
+
+def open_db() -> BinaryIO:
+    """
+    Opens the current DB version for reading, no lock is taken.
+    If the version gets pruned between reading the pointer and opening
+    the file, the pointer is read again.
+    """
+    for _ in range(RETRIES):
+        try:
+            return open(current_db_path(), 'rb')
+        except FileNotFoundError:
+            if not Path(DB_POINTER).is_file():
+                raise
+    raise FileNotFoundError(FILE_DB)
+
+@contextmanager
+def file_lock(
+        path: str | Path, held_by: str, timeout: float = LOCK_TIMEOUT
+    ) -> Generator[None, None, None]:
+    """
+    Advisory lock, a file created exclusively, which works on network drives
+    too, unlike fcntl/msvcrt locks.
+
+    Parameters:
+    path (str or Path): The lock file.
+    held_by (str): What holds the lock, for the error message.
+    timeout (float): Seconds to wait for the lock.
+
+    Raises:
+    RuntimeError: If the lock is not released in time, e.g. it was left
+    by a crashed process and has to be removed by hand.
+    """
+    deadline = monotonic() + timeout
+    while True:
+        try:
+            descriptor = os_open(path, O_CREAT | O_EXCL | O_WRONLY)
+            break
+        except FileExistsError as e:
+            if monotonic() >= deadline:
+                raise RuntimeError(
+                    f'{path} is held by another {held_by}. If there is none '
+                    + 'running, remove the file and try again.'
+                ) from e
+            sleep(0.5)
+    try:
+        write(descriptor, str(getpid()).encode())
+        close(descriptor)
+        yield
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+def writer_lock(timeout: float = LOCK_TIMEOUT) -> ContextManager[None]:
+    """
+    The lock serializing the writers of the DB, see file_lock.
+    """
+    return file_lock(DB_LOCK, 'import', timeout)
+
+def _prune_versions(versions: Path) -> None:
+    """
+    Removes all but KEEP_VERSIONS latest versions. A version still being
+    read cannot be removed on Windows, it is left for the next import then.
+    """
+    for version in sorted(versions.glob('*.db'))[:-KEEP_VERSIONS]:
+        try:
+            version.unlink()
+            parts_path(version).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+def parts_path(db_path: Path) -> Path:
+    return db_path.with_name(f'{db_path.name}.parts')
+
+def read_db(reader: BinaryIO) -> list:
+    """
+    Reads all the data from the DB. A DB may be written in many parts
+    (see new_db_version), each of them being a pickled list.
+    """
+    data = []
+    while True:
+        try:
+            part = load(reader, encoding='utf-8')
+        except EOFError:
+            return data
+        if part:
+            data.extend(part)
+
+def read_db_parts(db_path: Path) -> list[tuple[int, int, int]]:
+    """
+    Returns the index of the first item, the offset and the number of items
+    of every part of the DB version.
+
+    Raises:
+    FileNotFoundError: If the version has no table of parts, e.g. it was
+    written by an older version of the app, so it has to be read whole.
+    """
+    with open(parts_path(db_path), encoding='utf-8') as stream:
+        parts = json_load(stream)
+    table, first = [], 0
+    for offset, count in parts:
+        table.append((first, offset, count))
+        first += count
+    return table
+
+def read_db_part(db_path: Path, offset: int) -> list:
+    """
+    Reads the part of the DB version at the offset, see read_db_parts.
+    """
+    with open(db_path, 'rb') as reader:
+        reader.seek(offset)
+        return load(reader, encoding='utf-8')
+
+@contextmanager
+def new_db_version() -> Generator[Callable[[list], None], None, None]:
+    """
+    Yields the function writing the data to the new DB version, part
+    by part, each part being a pickled list of up to PART_SIZE items.
+    Once done, the version is published as the current one, with its table
+    of parts. If anything fails meanwhile, the version is dropped.
+    Must be used holding writer_lock.
+    """
+    versions = Path(DB_VERSIONS)
+    versions.mkdir(exist_ok=True)
+    latest = max((int(v.stem) for v in versions.glob('*.db')), default=0)
+    version = versions / f'{latest + 1:06d}.db'
+
+    temporary = versions / f'.{version.name}.tmp'
+    temporary_parts = versions / f'.{version.name}.parts.tmp'
+    parts = []
+    try:
+        with open(temporary, 'wb') as stream:
+
+            def write_part(data: list) -> None:
+                for start in range(0, len(data), PART_SIZE):
+                    part = data[start:start + PART_SIZE]
+                    parts.append((stream.tell(), len(part)))
+                    dump(part, stream, HIGHEST_PROTOCOL)
+
+            yield write_part
+            stream.flush()
+            fsync(stream.fileno())
+        with open(temporary_parts, 'w', encoding='utf-8') as stream:
+            json_dump(parts, stream)
+        replace(temporary_parts, parts_path(version))
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        temporary_parts.unlink(missing_ok=True)
+        raise
+    replace(temporary, version)
+
+    pointer = Path(f'{DB_POINTER}.tmp')
+    pointer.write_text(version.name, encoding='utf-8')
+    replace(pointer, DB_POINTER)
+
+    _prune_versions(versions)
+
+def publish_db(data: list) -> str:
+    """
+    Writes the data as a new DB version and makes it the current one.
+    Must be called holding writer_lock.
+
+    Returns:
+    str: The name of the version published.
+    """
+    with new_db_version() as write_part:
+        write_part(data)
+    return current_db_path().name
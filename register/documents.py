@@ -0,0 +1,127 @@
+"""
+Where the fixed asset documents are, below fa_path.
+
+Documents are laid out in directories according to the app settings
+(see FA_LAYOUTS), and FA_INDEX maps every serial to its documents
+(serials may repeat across units), so a document can be found without
+listing any directory. The index is rewritten holding FA_INDEX_LOCK,
+so the documents made by concurrent runs are all indexed.
+"""
+
+from json import dump, load
+from os import replace
+from pathlib import Path
+from typing import Iterable
+
+from .database import file_lock
+from .models import AppSettings, FixedAssetDocument
+
+
+FA_INDEX = 'index.json'
+FA_INDEX_LOCK = f'{FA_INDEX}.lock'
+
+
+def load_document_index(fa_path: str | Path) -> dict[str, list[str]]:
+    """
+    Returns the index: serials mapped to the paths of their documents,
+    relative to fa_path.
+    """
+    try:
+        with open(Path(fa_path) / FA_INDEX, encoding='utf-8') as stream:
+            return load(stream)
+    except FileNotFoundError:
+        return {}
+
+def save_document_index(
+        fa_path: str | Path, index: dict[str, list[str]]
+    ) -> None:
+    temporary = Path(fa_path) / f'{FA_INDEX}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as stream:
+        dump(index, stream, ensure_ascii=False, indent=0, sort_keys=True)
+    replace(temporary, Path(fa_path) / FA_INDEX)
+
+def _add_to_index(
+        index: dict[str, list[str]], serial: str, path: str | Path
+    ) -> None:
+    paths = index.setdefault(serial, [])
+    if (path := Path(path).as_posix()) not in paths:
+        paths.append(path)
+        paths.sort()
+
+def update_document_index(
+        fa_path: str | Path, entries: Iterable[tuple[str, str | Path]]
+    ) -> None:
+    """
+    Adds the documents' paths to the index, under their serials.
+
+    Parameters:
+    fa_path (str or Path): Where the documents and the index are.
+    entries (iterable of tuples): Serials with their documents' paths,
+    relative to fa_path.
+
+    Raises:
+    RuntimeError: If the index is locked by another run for too long.
+    """
+    entries = list(entries)
+    if entries:
+        with file_lock(Path(fa_path) / FA_INDEX_LOCK, 'run making documents'):
+            index = load_document_index(fa_path)
+            for serial, path in entries:
+                _add_to_index(index, serial, path)
+            save_document_index(fa_path, index)
+
+def find_documents(fa_path: str | Path, serial: str) -> list[Path]:
+    """
+    Returns the paths of the documents of the given serial, one for every
+    unit having it, an empty list if none was made yet.
+    """
+    return [
+        Path(fa_path) / path
+        for path in load_document_index(fa_path).get(serial, [])
+    ]
+
+def migrate_documents(
+        fixed_asset_documents: list[FixedAssetDocument],
+        app_settings: AppSettings,
+    ) -> int:
+    """
+    Moves the documents found below fa_path to their places in the current
+    layout and rebuilds the index, holding its lock all along, so no
+    document made meanwhile is left out. Documents which are not in the DB
+    anymore stay where they are, but are indexed too.
+
+    Returns:
+    int: The number of documents moved.
+
+    Raises:
+    RuntimeError: If the index is locked by another run for too long.
+    """
+    fa_path = Path(app_settings.fa_path)
+    documents = {
+        document.document_name: document for document in fixed_asset_documents
+    }
+    index, moved = {}, 0
+    with file_lock(fa_path / FA_INDEX_LOCK, 'run making documents'):
+        for filename in sorted(fa_path.rglob('*.xlsx')):
+            document = documents.get(filename.stem)
+            if document is None:
+                serial = filename.stem.rsplit('-', 1)[-1]
+                _add_to_index(index, serial, filename.relative_to(fa_path))
+                continue
+
+            relative_path = document.relative_path(
+                app_settings.fa_layout, app_settings.fa_shards
+            )
+            if filename != fa_path / relative_path:
+                (fa_path / relative_path).parent.mkdir(
+                    parents=True, exist_ok=True
+                )
+                replace(filename, fa_path / relative_path)
+                moved += 1
+            _add_to_index(index, document.document_name_serial, relative_path)
+
+        for directory in sorted(fa_path.rglob('*'), reverse=True):
+            if directory.is_dir() and not any(directory.iterdir()):
+                directory.rmdir()
+        save_document_index(fa_path, index)
+    return moved
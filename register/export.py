@@ -0,0 +1,111 @@
+from contextlib import ExitStack
+from csv import DictWriter
+from gzip import GzipFile
+from io import StringIO
+from json import dumps
+from typing import Any
+
+from .models import FixedAsset, FixedAssetDocument
+
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_FIELDS = (
+    'document_name_unit',
+    'document_name_serial',
+    *FixedAsset.model_fields,
+)
+CHUNK_SIZE = 1000
+
+
+def select_export_fields(fields: str | None) -> tuple[str, ...]:
+    """
+    Parameters:
+    fields (str | None): Comma separated names of the fields to export,
+    None means all of them (EXPORT_FIELDS).
+
+    Returns:
+    tuple: Names of the fields in the requested order.
+
+    Raises:
+    ValueError: If a field is not one of EXPORT_FIELDS.
+    """
+    if not fields:
+        return EXPORT_FIELDS
+    selected = tuple(field.strip() for field in fields.split(','))
+    if unknown := [field for field in selected if field not in EXPORT_FIELDS]:
+        raise ValueError(
+            f'Unknown fields: {", ".join(unknown)}.\n'
+            + f'Choose from: {", ".join(EXPORT_FIELDS)}.'
+        )
+    return selected
+
+def export_record(
+        document: FixedAssetDocument,
+        fields: tuple[str, ...],
+        gdpr: bool = False,
+    ) -> dict[str, Any]:
+    """
+    Flattens the document to a record holding only the given fields.
+    The document itself is left untouched, even if gdpr is set.
+    """
+    record = document.fixed_asset.model_dump()
+    record['document_name_unit'] = document.document_name_unit
+    record['document_name_serial'] = document.document_name_serial
+    if gdpr:
+        record['material_duty_person'] = 'GDPR'
+    return {field: record[field] for field in fields}
+
+def export_fixed_assets(
+        fixed_asset_documents: list[FixedAssetDocument],
+        filename: str,
+        export_format: str = 'csv',
+        fields: tuple[str, ...] = EXPORT_FIELDS,
+        gdpr: bool = False,
+        compress: bool = False,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> int:
+    """
+    Writes the documents to a CSV or JSON Lines file. Records are rendered
+    to a buffer holding at most chunk_size of them, which is then written
+    out, so the memory used does not depend on the size of the register.
+
+    Parameters:
+    fixed_asset_documents (list of FixedAssetDocument objects).
+    filename (str): Where to write the export to.
+    export_format (str): One of EXPORT_FORMATS.
+    fields (tuple): Names of the fields to export, see select_export_fields.
+    gdpr (bool): If True, hides material duty person.
+    compress (bool): If True, the file is gzipped.
+    chunk_size (int): Number of records written at once.
+
+    Returns:
+    int: The number of exported records.
+    """
+    buffer = StringIO()
+    writer = DictWriter(buffer, fields, lineterminator='\n')
+    if export_format == 'csv':
+        writer.writeheader()
+
+    count = 0
+    with ExitStack() as stack:
+        stream = stack.enter_context(open(filename, 'wb'))
+        if compress:
+            # Neither a timestamp nor a file name goes to the gzip header,
+            # so the same data always gives the same bytes.
+            stream = stack.enter_context(
+                GzipFile(filename='', mode='wb', fileobj=stream, mtime=0)
+            )
+        for document in fixed_asset_documents:
+            record = export_record(document, fields, gdpr)
+            if export_format == 'csv':
+                writer.writerow(record)
+            else:
+                buffer.write(dumps(record, ensure_ascii=False))
+                buffer.write('\n')
+            count += 1
+            if count % chunk_size == 0:
+                stream.write(buffer.getvalue().encode('utf-8'))
+                buffer.seek(0)
+                buffer.truncate()
+        stream.write(buffer.getvalue().encode('utf-8'))
+    return count
@@ -1,18 +1,53 @@
-from itertools import islice
-from multiprocessing import Pool
-from pickle import dump, load
+from bisect import bisect_right
+from datetime import datetime
+from itertools import chain, islice
+from json import dump as json_dump
+from multiprocessing import Pool, cpu_count
+from operator import itemgetter
+from pathlib import Path
 from re import match
-from typing import Any
+from typing import Any, Callable, Iterable, Sequence
 
 from pydantic import ValidationError
 
+from .database import (
+    FILE_DB,
+    current_db_path,
+    open_db,
+    publish_db,
+    read_db,
+    read_db_part,
+    read_db_parts,
+    writer_lock,
+)
+from .documents import update_document_index
 from .financial_sources import FINANCIAL_SOURCES
 from .helpers import exit_with_info, user_input
 from .models import AppSettings, FixedAsset, FixedAssetDocument
-from .workbook import setup_workbook
+from .snapshots import save_snapshot
+from .workbook import ROW_LAYOUT, ROW_POSITION, setup_workbook
 
 
-FILE_DB = 'fixed_assets.db'
+FILE_ERRORS = 'import_errors'
+
+ORDINAL_NUMBER = ROW_POSITION['ordinal_number']
+FINANCIAL_SOURCE = ROW_POSITION['financial_source']
+UNIT = ROW_POSITION['unit']
+INVENTORY_NUMBER = ROW_POSITION['inventory_number']
+
+# Pairs of (key, position) of the remapped row a FixedAsset is made of,
+# i.e. everything but 'ordinal_number', 'financial_source' and 'unit'.
+FIXED_ASSET_LAYOUT = tuple(
+    (key, ROW_POSITION[key]) for key in islice(ROW_LAYOUT, 3, None)
+)
+
+# The DB version a worker of generate_fixed_asset_documents reads,
+# its parts (see read_db_parts), the number and the documents of the part
+# read last, and the error if the version cannot be read
+_worker_db: Path | None = None
+_worker_parts: list[tuple[int, int, int]] = []
+_worker_part: tuple[int, list[FixedAssetDocument]] = (-1, [])
+_worker_error: str | None = None
 
 
 def skip_on_pattern(value: str) -> bool:
@@ -53,90 +88,248 @@ def financial_cost_values(financial_source: str) -> list[str, str] | None:
         ]
     return None
 
-def set_financial_source(row: dict[str, Any]) -> bool:
+def resolve_financial_source(financial_source: Any) -> tuple[str, str] | None:
     """
-    If financial_source (row['financial_source']) is given (which is mostly true),
-    it is translated to psp and cost_center repectivly.
+    If financial_source is given (which is mostly true), it is translated
+    to psp and cost_center repectivly.
     Sometimes financial_source may be given as a string however, if this is the
     case we check if the stirng starts with 'P' or 'p'.
-    If it does, we return False - we don't need to create a FixedAsset document.
+    If it does, we return None - we don't need to create a FixedAsset document.
 
     Parameters:
-    row (dictionary): The current row of the Excel data.
+    financial_source: The financial source cell of the current row.
 
     Returns:
-    bool: True if financial_source was set, False otherwise.
+    tuple: psp and cost_center if financial_source was resolved,
+    None otherwise.
     """
-    financial_source = row['financial_source']
     if isinstance(financial_source, str) and financial_source[0] == 'P':
-        return False
+        return None
 
     if financial_source is None:
-        row['psp'] = row['cost_center'] = ''
-    else:
-        source = financial_cost_values(financial_source)
-        if source is None:
-            row['psp'] = row['cost_center'] = str(financial_source)
-        else:
-            row['psp'], row['cost_center'] = source
-
-    return True
-
-def create_fixed_asset(row: dict[str, Any]) -> FixedAsset:
+        return '', ''
+    source = financial_cost_values(financial_source)
+    if source is None:
+        return str(financial_source), str(financial_source)
+    return source[0], source[1]
+
+def create_fixed_asset(
+        row: tuple, psp: str, cost_center: str
+    ) -> FixedAsset:
     """
+    Remaps the row straight to the model input, following FIXED_ASSET_LAYOUT,
+    so there is only one dictionary made per row.
+
     Parameters:
-    row (dictionary): The current row of the Excel data.
+    row (tuple): The current remapped row of the Excel data.
+    psp, cost_center (str): Values resolved from the financial source.
 
     Returns:
     FixedAsset: The created FixedAsset object.
     """
-    fixed_asset = dict(islice(row.items(), 3, None))
+    fixed_asset = {key: row[position] for key, position in FIXED_ASSET_LAYOUT}
+    fixed_asset['psp'] = psp
+    fixed_asset['cost_center'] = cost_center
     return FixedAsset.model_validate(fixed_asset)
 
-def select_fixed_asset_documents(
-        rows: list[dict[Any]]
-    ) -> list[FixedAssetDocument]:
+def validation_error_entry(
+        i: int, row: tuple, error: ValidationError
+    ) -> dict[str, Any]:
     """
-    This is the most important function of this module. It takes
-    all the previously remapped data from the workbook and creates
-    a list of FixedAssetDocument objects.
-    It also validates the data and skips rows which are currently
-    not needed in the register.
+    Describes a row which did not pass the validation, so it can be
+    reported along with the others.
+
+    Parameters:
+    i (int): Number of the row, counting from 1 as the first data row.
+    row (tuple): The row laid out as ROW_LAYOUT.
+    error (ValidationError): What pydantic complained about.
+    """
+    return {
+        'row': i + 1,
+        'ordinal_number': row[ORDINAL_NUMBER],
+        'values': dict(zip(ROW_LAYOUT, row)),
+        'errors': [
+            {
+                'field': '.'.join(str(loc) for loc in detail['loc']),
+                'message': detail['msg'],
+            }
+            for detail in error.errors(include_url=False)
+        ],
+    }
+
+def select_documents_from_shard(
+        rows: list[tuple], first: int = 1, collect_errors: bool = False
+    ) -> tuple[list[FixedAssetDocument], list[dict[str, Any]]]:
+    """
+    Validates a run of rows and creates FixedAssetDocument objects from those
+    needed in the register. It is meant to be run serially as well as
+    in a worker process, that is why it raises RuntimeError instead of exiting.
 
     Parameters:
-    rows (list of dictionaries).
+    rows (list of tuples laid out as ROW_LAYOUT).
+    first (int): Number of the first row in the whole sheet, counting from 1.
+    collect_errors (bool): If True, rows which do not pass the validation
+    are collected instead of raising on the first one.
 
     Returns:
-    list: A list of FixedAssetDocument objects.
+    tuple: A list of FixedAssetDocument objects and a list of errors
+    (see validation_error_entry).
+
+    Raises:
+    RuntimeError: If a row does not pass the validation
+    and collect_errors is False.
     """
     fixed_asset_documents = []
-    for i, row in enumerate(rows, 1):
-        ordinal_number = row['ordinal_number']
-        inventory_number = row['inventory_number']
+    errors = []
+    for i, row in enumerate(rows, first):
+        ordinal_number = row[ORDINAL_NUMBER]
+        inventory_number = row[INVENTORY_NUMBER]
 
         if (ordinal_number is None or inventory_number is None
-            and i > 1 and ordinal_number == rows[i - 1]['ordinal_number']):
+            and i > 1 and ordinal_number == rows[i - first][ORDINAL_NUMBER]):
             continue
 
         serial = get_serial(inventory_number)
-        if not serial or not set_financial_source(row):
+        if not serial:
+            continue
+        financial_source = resolve_financial_source(row[FINANCIAL_SOURCE])
+        if financial_source is None:
             continue
 
         try:
-            fixed_asset = create_fixed_asset(row)
+            fixed_asset = create_fixed_asset(row, *financial_source)
         except ValidationError as e:
-            exit_with_info(
-                f"\nError at ordinal_number {row['ordinal_number']}:\n\n"
-                + f'{e}:\n\n{row}'
-            )
+            if collect_errors:
+                errors.append(validation_error_entry(i, row, e))
+                continue
+            raise RuntimeError(
+                f'\nError at ordinal_number {ordinal_number}:\n\n'
+                + f'{e}:\n\n{dict(zip(ROW_LAYOUT, row))}'
+            ) from e
         fixed_asset_document = FixedAssetDocument(
-            document_name_unit=row['unit'],
+            document_name_unit=row[UNIT],
             document_name_serial=serial,
             fixed_asset=fixed_asset
         )
 
         fixed_asset_documents.append(fixed_asset_document)
-    return fixed_asset_documents
+    return fixed_asset_documents, errors
+
+def shard_rows(
+        rows: list[tuple], shards: int
+    ) -> list[tuple[int, list[tuple]]]:
+    """
+    Splits rows into (roughly) equal shards. A shard always ends at
+    the boundary of an ordinal number group, so rows making one asset
+    (an invoice or a group of them) are never validated apart.
+
+    Parameters:
+    rows (list of tuples laid out as ROW_LAYOUT).
+    shards (int): The number of shards wanted.
+
+    Returns:
+    list: Pairs of the first row number (counting from 1) and the shard.
+    """
+    size = max(1, -(-len(rows) // max(1, shards)))
+    sharded = []
+    start = 0
+    while start < len(rows):
+        stop = min(start + size, len(rows))
+        while stop < len(rows) and (
+            rows[stop][ORDINAL_NUMBER] is None
+            or rows[stop][ORDINAL_NUMBER] == rows[stop - 1][ORDINAL_NUMBER]
+        ):
+            stop += 1
+        sharded.append((start + 1, rows[start:stop]))
+        start = stop
+    return sharded
+
+def write_error_report(errors: list[dict[str, Any]]) -> None:
+    """
+    Writes all the rows which did not pass the validation to FILE_ERRORS,
+    both as text, to be read by a human, and json.
+    """
+    with open(f'{FILE_ERRORS}.txt', 'w', encoding='utf-8') as stream:
+        for error in errors:
+            stream.write(
+                f"Row {error['row']}, "
+                + f"ordinal_number {error['ordinal_number']}:\n"
+            )
+            for detail in error['errors']:
+                stream.write(f"  {detail['field']}: {detail['message']}\n")
+            stream.write(f"  {error['values']}\n\n")
+    with open(f'{FILE_ERRORS}.json', 'w', encoding='utf-8') as stream:
+        json_dump(errors, stream, default=str, ensure_ascii=False, indent=1)
+
+def report_validation_errors(errors: list[dict[str, Any]]) -> str:
+    """
+    Writes the error report and returns the message telling where it is.
+    """
+    write_error_report(errors)
+    return (
+        f'{len(errors)} rows did not pass the validation, '
+        + f'see {FILE_ERRORS}.txt and {FILE_ERRORS}.json for details.'
+    )
+
+def _select_documents_or_error(
+        rows: list[tuple], first: int, collect_errors: bool
+    ) -> tuple[list[FixedAssetDocument], list[dict[str, Any]]] | RuntimeError:
+    """
+    select_documents_from_shard returning the error instead of raising it,
+    so the errors of all shards are known in order.
+    """
+    try:
+        return select_documents_from_shard(rows, first, collect_errors)
+    except RuntimeError as e:
+        return e
+
+def select_fixed_asset_documents(
+        rows: list[tuple],
+        processes: int = 1,
+        collect_errors: bool = False,
+        first: int = 1,
+    ) -> list[FixedAssetDocument]:
+    """
+    This is the most important function of this module. It takes
+    all the previously remapped data from the workbook and creates
+    a list of FixedAssetDocument objects.
+    It also validates the data and skips rows which are currently
+    not needed in the register.
+
+    Parameters:
+    rows (list of tuples laid out as ROW_LAYOUT).
+    processes (int): Number of worker processes validating the rows,
+    0 means one per CPU. The result is the same as the serial one (1).
+    collect_errors (bool): If True, the whole sheet is validated and all
+    errors are written to FILE_ERRORS before exiting, otherwise we exit
+    on the first error.
+    first (int): Number of the first row in the whole sheet, counting from 1,
+    if only some rows of the sheet are given.
+
+    Returns:
+    list: A list of FixedAssetDocument objects.
+    """
+    processes = processes or cpu_count()
+    if processes == 1:
+        shards = [_select_documents_or_error(rows, first, collect_errors)]
+    else:
+        with Pool(processes) as p:
+            shards = p.starmap(
+                _select_documents_or_error,
+                [
+                    (shard, first + offset - 1, collect_errors)
+                    for offset, shard in shard_rows(rows, processes)
+                ]
+            )
+    # the error of the first shard failing is the one the serial run meets
+    for shard in shards:
+        if isinstance(shard, RuntimeError):
+            exit_with_info(f'{shard}')
+
+    errors = list(chain.from_iterable(e for _, e in shards))
+    if errors:
+        exit_with_info(report_validation_errors(errors))
+    return list(chain.from_iterable(documents for documents, _ in shards))
 
 def check_duplicated_serials(
         elemets: list[tuple, FixedAsset]
@@ -166,26 +359,66 @@ def print_double_elements(
                 print(f'\t{u}\n{fa}')
     print('Please check your data and try again.')
 
-def process_workbook_data(rows: list[tuple]) -> None:
+def process_workbook_data(
+        rows: list[tuple],
+        processes: int = 1,
+        collect_errors: bool = False,
+        on_published: Callable[[str], None] | None = None,
+    ) -> None:
     """
     Imports selected data from a workbook and stores it
     in a pickle DB file if there is no doubled elements (serials).
     The latter means error in the provided data, so no dump is done.
+    The DB is published as a new version (see register.database), so
+    others may read the previous one meanwhile. Every import is also kept
+    as a snapshot (see register.snapshots).
+
+    Parameters:
+    on_published (callable): See store_fixed_asset_documents.
     """
-    selected_items = select_fixed_asset_documents(rows)
+    selected_items = select_fixed_asset_documents(
+        rows, processes, collect_errors
+    )
 
     # double_elements = check_duplicated_serials(selected_items)
     double_elements = None
     if double_elements:
         print_double_elements(double_elements, selected_items)
     else:
-        with open(FILE_DB, 'wb') as stream:
-            dump(selected_items, stream)
+        store_fixed_asset_documents(selected_items, on_published)
+
+def store_fixed_asset_documents(
+        fixed_asset_documents: list[FixedAssetDocument],
+        on_published: Callable[[str], None] | None = None,
+    ) -> str:
+    """
+    Publishes the documents as the new DB version and keeps them
+    as a snapshot.
+
+    Parameters:
+    on_published (callable): Called with the name of the version published,
+    still holding writer_lock, so no other import may publish meanwhile.
+
+    Returns:
+    str: The name of the version published.
+    """
+    try:
+        with writer_lock():
+            db_version = publish_db(fixed_asset_documents)
+            save_snapshot(fixed_asset_documents)
+            if on_published is not None:
+                on_published(db_version)
+    except RuntimeError as e:
+        exit_with_info(f'Error: {e}')
+    return db_version
 
-def load_fixed_assets() -> list[FixedAssetDocument]:
+def load_fixed_assets(db_path: Path | None = None) -> list[FixedAssetDocument]:
+    """
+    Loads the current DB version, or the given one.
+    """
     try:
-        with open(FILE_DB, 'rb') as reader:
-            fixed_assets = load(reader, encoding='utf-8')
+        with open_db() if db_path is None else open(db_path, 'rb') as reader:
+            fixed_assets = read_db(reader)
     except FileNotFoundError:
         exit_with_info(f'File \'{FILE_DB}\' cannot be opened.')
     if fixed_assets is None:
@@ -213,9 +446,9 @@ def print_fixed_assets(
             document.fixed_asset.material_duty_person = 'GDPR'
         print(document.fixed_asset.model_dump_json(by_alias=True, indent=2))
 
-def generate_document(fixed_asset_document: FixedAssetDocument) -> None:
+def generate_document(fixed_asset_document: FixedAssetDocument) -> Path:
     try:
-        fixed_asset_document.generate_document()
+        return fixed_asset_document.generate_document()
     except (
         FileNotFoundError,
         OSError,
@@ -224,27 +457,198 @@ def generate_document(fixed_asset_document: FixedAssetDocument) -> None:
     ) as e:
         raise RuntimeError(f'{e}') from e
 
+def _load_worker_documents(db_path: Path) -> None:
+    """
+    Pool initializer: every worker reads just the table of parts of the DB
+    version the parent selected the documents from, the parts themselves
+    are read when needed, see _worker_document.
+    """
+    # pylint: disable-next=global-statement
+    global _worker_db, _worker_parts, _worker_part, _worker_error
+    _worker_db = db_path
+    try:
+        try:
+            _worker_parts = read_db_parts(db_path)
+        except FileNotFoundError:
+            # a version w/o the table of parts is read whole, as one part
+            with open(db_path, 'rb') as reader:
+                documents = read_db(reader)
+            _worker_parts = [(0, 0, len(documents))]
+            _worker_part = (0, documents)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        # raising here would make the pool start new workers over and over
+        _worker_error = f'Cannot read {db_path}: {e!r}'
+
+def _worker_document(index: int) -> FixedAssetDocument:
+    """
+    Returns the document at the given index of the DB, reading the part
+    holding it unless it was read last. The indices come in runs, so most
+    of the documents are in the part read last.
+
+    Raises:
+    IndexError: If there is no such document.
+    """
+    global _worker_part  # pylint: disable=global-statement
+    number = bisect_right(_worker_parts, index, key=itemgetter(0)) - 1
+    if number < 0:
+        raise IndexError(index)
+    first, offset, count = _worker_parts[number]
+    if index >= first + count:
+        raise IndexError(index)
+    if _worker_part[0] != number:
+        _worker_part = (-1, [])
+        _worker_part = (number, read_db_part(_worker_db, offset))
+    return _worker_part[1][index - first]
+
+def _generate_document_at(index: int) -> tuple[str, str, Path | str]:
+    """
+    Makes the document stored at the given index of the DB.
+
+    Returns:
+    tuple: The serial and the name of the document, then the path
+    of the document or the error if there was one.
+    """
+    if _worker_error is not None:
+        return '', f'#{index}', _worker_error
+    try:
+        document = _worker_document(index)
+    except IndexError:
+        return '', f'#{index}', 'Not found in the DB.'
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return '', f'#{index}', f'Cannot read {_worker_db}: {e!r}'
+    try:
+        path = generate_document(document)
+    except RuntimeError as e:
+        return document.document_name_serial, document.document_name, f'{e}'
+    return document.document_name_serial, document.document_name, path
+
+def select_document_indices(
+        fixed_asset_documents: list[FixedAssetDocument],
+        serials: Iterable[str] | None = None,
+        units: Iterable[str] = (),
+        cost_centers: Iterable[str] = (),
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> tuple[list[int], set[str]]:
+    """
+    Selects the documents matching all of the given criteria, going through
+    the documents once whatever the number of serials.
+
+    Parameters:
+    fixed_asset_documents (list of FixedAssetDocument objects).
+    serials (iterable of str): Serial numbers, None for any.
+    units (iterable of str): Units, e.g. 'D111/1', empty for any.
+    cost_centers (iterable of str): Cost centers, empty for any.
+    date_from, date_to (datetime): Range of the dates of the fixed assets,
+    both ends included. Assets without a date are left out if given.
+
+    Returns:
+    tuple: The indices of the documents selected and the serials
+    which are not in the DB.
+    """
+    serials = None if serials is None else set(serials)
+    units = {unit.replace('/', '_') for unit in units}
+    cost_centers = set(cost_centers)
+    indices, found = [], set()
+    for index, document in enumerate(fixed_asset_documents):
+        if serials is not None:
+            if document.document_name_serial not in serials:
+                continue
+            found.add(document.document_name_serial)
+        if units and document.document_name_unit not in units:
+            continue
+        if cost_centers and (
+            document.fixed_asset.cost_center not in cost_centers
+        ):
+            continue
+        if date_from or date_to:
+            try:
+                date = datetime.strptime(document.fixed_asset.date, '%d-%m-%Y')
+            except ValueError:
+                continue
+            if (date_from and date < date_from) or (date_to and date > date_to):
+                continue
+        indices.append(index)
+    return indices, (serials or set()) - found
+
+def generate_fixed_asset_documents(
+        indices: Sequence[int],
+        db_path: Path | None = None,
+        processes: int = 0,
+    ) -> None:
+    """
+    Makes the fixed asset documents (Excel files) stored at the given indices
+    of the DB, all of them in a single run of the pool.
+
+    Workers get just the indices of the documents, reading the documents
+    themselves from the DB, just the parts holding them, so no document
+    is pickled to be sent over and no worker holds the whole DB.
+    A failed document does not stop the others, all failures are reported
+    at the end. The documents made are added to the index of documents,
+    see register.documents.
+
+    Parameters:
+    indices (sequence of int): See select_document_indices.
+    db_path (Path): The DB version the indices refer to,
+    current_db_path() by default.
+    processes (int): Number of worker processes, 0 means one per CPU.
+    """
+    if not indices:
+        return
+    try:
+        # the settings are checked before any worker needs them
+        fa_path = AppSettings().fa_path
+    except ValidationError as e:
+        exit_with_info(f'Error: {e}')
+
+    processes = min(processes or cpu_count(), len(indices))
+    chunksize = max(1, len(indices) // (processes * 4))
+    generated, failures = [], []
+    with Pool(
+        processes,
+        initializer=_load_worker_documents,
+        initargs=(db_path or current_db_path(),),
+    ) as p:
+        for serial, name, result in p.imap_unordered(
+            _generate_document_at, indices, chunksize
+        ):
+            if isinstance(result, Path):
+                generated.append((serial, result))
+            else:
+                failures.append((name, result))
+    try:
+        update_document_index(fa_path, generated)
+    except RuntimeError as e:
+        exit_with_info(f'Error: {e}')
+
+    if failures:
+        for name, error in sorted(failures):
+            print(f'{name}: {error}')
+        exit_with_info(
+            f'Error: {len(failures)} of {len(indices)} documents '
+            + 'could not be made.'
+        )
+
 def generate_fixed_asset_document(
         fixed_asset_documents: list[FixedAssetDocument],
         serial: str,
+        db_path: Path | None = None,
+        processes: int = 0,
     ) -> None:
     """
     Makes the fixed asset document (Excel file) based on the passed serial.
-    """
-    if serial == '--all':
-        documents_to_generate = fixed_asset_documents
-    else:
-        documents_to_generate = [
-            document for document in fixed_asset_documents
-            if document.document_name_serial == serial
-        ]
 
-    with Pool() as p:
-        try:
-            p.map(generate_document, documents_to_generate)
-        except RuntimeError as e:
-            p.terminate()
-            exit_with_info(f'Error: {e}')
+    Parameters:
+    fixed_asset_documents (list of FixedAssetDocument objects), loaded
+    from db_path.
+    serial (str): Serial number of the fixed asset, '--all' for all of them.
+    db_path (Path): The DB version, current_db_path() by default.
+    processes (int): Number of worker processes, 0 means one per CPU.
+    """
+    indices, _ = select_document_indices(
+        fixed_asset_documents, None if serial == '--all' else [serial]
+    )
+    generate_fixed_asset_documents(indices, db_path, processes)
 
 def get_app_settings() -> AppSettings:
     """
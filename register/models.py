@@ -3,6 +3,7 @@ from json import load, dump
 from pathlib import Path
 from re import match, split, sub
 from typing import Any
+from zlib import crc32
 
 from openpyxl.workbook.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
@@ -21,15 +22,20 @@ from pydantic.alias_generators import to_camel
 
 COMMITTEE = ['John Smith', 'Jane Doe']
 
+# Directories the fixed asset documents are put in, below fa_path
+FA_LAYOUTS = ('flat', 'unit', 'year', 'unit/year')
+
 
 class AppSettings(BaseModel):
-    data_path: Path = Path.cwd()
+    data_path: Path = Field(default_factory=Path.cwd)
     config_file: str = 'settings.txt'
     wb_filename: str | None = None
     sheetname: str | None = None
     fa_filename: str ='FA_template.xlsx'
     fa_path: str = 'FA_documents'
     last_column: int | None = None
+    fa_layout: str = 'flat'
+    fa_shards: int = Field(default=0, ge=0)
     committee: list = Field(
         min_length=1,
         max_length=3,
@@ -47,6 +53,12 @@ class AppSettings(BaseModel):
 
             self.__dict__.update(config)
             self.data_path = Path(config.get('data_path'))
+            # these are set by editing the file only, so validated here
+            for key in ('fa_layout', 'fa_shards'):
+                if key in config:
+                    self.__pydantic_validator__.validate_assignment(
+                        self, key, config[key]
+                    )
 
     def list_excel_files(self) -> list[str] | None:
         path = self.data_path.home()
@@ -73,6 +85,8 @@ class AppSettings(BaseModel):
                 "fa_path": self.fa_path,
                 "fa_filename": self.fa_filename,
                 "last_column": self.last_column,
+                "fa_layout": self.fa_layout,
+                "fa_shards": self.fa_shards,
                 "configured": self.configured,
             }
             try:
@@ -81,6 +95,13 @@ class AppSettings(BaseModel):
             except OSError as e:
                 print(f'Write error: ({e})')
 
+    @field_validator('fa_layout')
+    @classmethod
+    def fa_layout_parser(cls, value: str) -> str:
+        if value not in FA_LAYOUTS:
+            raise ValueError(f'fa_layout must be one of: {", ".join(FA_LAYOUTS)}')
+        return value
+
     def fix_fa_path(self) -> None:
         fa_path = self.data_path / self.fa_path
         if not Path.is_dir(fa_path):
@@ -293,7 +314,7 @@ class FixedAssetDocument(BaseModel):
             sheet[cell] = value
 
     @classmethod
-    def _load_template(cls) -> None:
+    def _load_template(cls) -> tuple[Workbook, AppSettings]:
         """
         Loads the template file.
         """
@@ -301,23 +322,55 @@ class FixedAssetDocument(BaseModel):
         template_filename = Path(settings.fa_filename)
         try:
             document: Workbook = load_workbook(template_filename)
-            return (document, settings.fa_path)
+            return (document, settings)
         except ValueError as e:
             raise FileNotFoundError('Template file not found.') from e
 
-    def generate_document(self) -> None:
+    @property
+    def document_name(self) -> str:
+        return f'{self.document_name_unit}-{self.document_name_serial}'
+
+    def relative_path(self, layout: str = 'flat', shards: int = 0) -> Path:
+        """
+        Returns the path of the document relative to fa_path.
+
+        Parameters:
+        layout (str): One of FA_LAYOUTS. The year is the one the asset
+        was registered in.
+        shards (int): If set, documents are also spread over this number
+        of directories, by a hash of the serial.
+        """
+        parts = []
+        if 'unit' in layout:
+            parts.append(self.document_name_unit)
+        if 'year' in layout:
+            parts.append(self.fixed_asset.date[-4:] or 'unknown_year')
+        if shards:
+            shard = crc32(self.document_name_serial.encode()) % shards
+            parts.append(f'{shard:0{len(str(shards - 1))}d}')
+        return Path(*parts, f'{self.document_name}.xlsx')
+
+    def generate_document(self) -> Path:
         """
         Makes the fixed asset document.
 
         Notice the variable 'document' we use here is a Workbook object,
         not FixedAssetDocument.
+
+        Returns:
+        Path: The path of the document relative to fa_path.
         """
-        document, path = self._load_template()
+        document, settings = self._load_template()
         self._populate_worksheet(
             document.active,
             self.fixed_asset.model_dump()
         )
-        document_name = \
-            f'{self.document_name_unit}-{self.document_name_serial}'
-        document.active.title = document_name
-        document.save(Path(f'{path}/{document_name}.xlsx'))
+        document.active.title = self.document_name
+        relative_path = self.relative_path(
+            settings.fa_layout, settings.fa_shards
+        )
+        filename = Path(settings.fa_path) / relative_path
+        if relative_path.parent != Path():
+            filename.parent.mkdir(parents=True, exist_ok=True)
+        document.save(filename)
+        return relative_path
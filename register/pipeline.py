@@ -0,0 +1,190 @@
+"""
+Pipelined import: reading the workbook, validating the rows and writing
+the DB run at the same time, each in its own thread:
+
+reader ----> rows queue ----> validator ----> documents queue ----> writer
+
+Both queues are bounded, so a fast stage waits for a slow one instead
+of piling up data, and the wall time gets close to the slowest stage.
+With processes > 1 the validator hands the batches to a process pool,
+so the validation does not compete with reading for the GIL.
+"""
+
+from collections import deque
+from multiprocessing import Pool, cpu_count
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Any, Callable, Iterable, Iterator
+
+from .database import current_db_path, new_db_version, writer_lock
+from .functions import (
+    ORDINAL_NUMBER,
+    report_validation_errors,
+    select_documents_from_shard,
+)
+from .helpers import exit_with_info
+from .models import FixedAssetDocument
+from .snapshots import save_manifest, write_snapshot
+
+
+BATCH_SIZE = 500
+QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+def _put(queue: Queue, item: Any, stop: Event) -> bool:
+    """
+    Puts the item to the queue, waiting for a free slot unless the pipeline
+    is stopped meanwhile.
+
+    Returns:
+    bool: False if the pipeline was stopped, True otherwise.
+    """
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=0.1)
+            return True
+        except Full:
+            continue
+    return False
+
+def _get(queue: Queue, stop: Event) -> Iterator[Any]:
+    """
+    Yields the items from the queue until the end of data or the pipeline
+    is stopped. An exception put to the queue is raised.
+    """
+    while not stop.is_set():
+        try:
+            item = queue.get(timeout=0.1)
+        except Empty:
+            continue
+        if item is _DONE:
+            return
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+def _read_batches(rows: Iterable[tuple], batches: Queue, stop: Event) -> None:
+    """
+    The reader stage. Puts the rows to the queue in batches of (at least)
+    BATCH_SIZE rows, each ending at the boundary of an ordinal number group.
+    """
+    try:
+        batch, first = [], 1
+        for row in rows:
+            if (len(batch) >= BATCH_SIZE and row[ORDINAL_NUMBER] is not None
+                and row[ORDINAL_NUMBER] != batch[-1][ORDINAL_NUMBER]):
+                if not _put(batches, (batch, first), stop):
+                    return
+                first += len(batch)
+                batch = []
+            batch.append(row)
+        if batch:
+            _put(batches, (batch, first), stop)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        _put(batches, e, stop)
+    _put(batches, _DONE, stop)
+
+def _validate_batches(
+        batches: Queue,
+        documents: Queue,
+        stop: Event,
+        processes: int,
+        collect_errors: bool,
+    ) -> None:
+    """
+    The validator stage. Turns every batch of rows into documents
+    (and errors, if collected) and puts them to the queue, in order.
+    """
+    arguments = (
+        (batch, first, collect_errors) for batch, first in _get(batches, stop)
+    )
+    try:
+        if processes == 1:
+            for item in (select_documents_from_shard(*a) for a in arguments):
+                if not _put(documents, item, stop):
+                    return
+        else:
+            # at most QUEUE_SIZE batches are given to the pool at a time,
+            # Pool.imap would take them all and keep the results unbounded
+            with Pool(processes) as p:
+                pending = deque()
+                for a in arguments:
+                    pending.append(
+                        p.apply_async(select_documents_from_shard, a)
+                    )
+                    if len(pending) >= QUEUE_SIZE:
+                        if not _put(documents, pending.popleft().get(), stop):
+                            return
+                while pending:
+                    if not _put(documents, pending.popleft().get(), stop):
+                        return
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        _put(documents, e, stop)
+    _put(documents, _DONE, stop)
+
+def import_pipelined(
+        rows: Iterable[tuple],
+        processes: int = 1,
+        collect_errors: bool = False,
+        on_published: Callable[[str], None] | None = None,
+    ) -> str:
+    """
+    Imports the rows the way process_workbook_data does, but reads,
+    validates and writes them at the same time. This thread is the writer:
+    it dumps every batch of documents to the new DB version and the snapshot
+    as it arrives, so the memory used does not grow with the register.
+
+    Parameters:
+    rows (iterable of tuples laid out as ROW_LAYOUT), e.g. iter_workbook_data.
+    processes (int): Number of processes validating the rows,
+    0 means one per CPU.
+    collect_errors (bool): See select_fixed_asset_documents.
+    on_published (callable): See store_fixed_asset_documents.
+
+    Returns:
+    str: The name of the DB version published.
+    """
+    batches, documents = Queue(QUEUE_SIZE), Queue(QUEUE_SIZE)
+    stop = Event()
+    Thread(
+        target=_read_batches, args=(rows, batches, stop), daemon=True
+    ).start()
+    Thread(
+        target=_validate_batches,
+        args=(batches, documents, stop, processes or cpu_count(), collect_errors),
+        daemon=True,
+    ).start()
+
+    def stored_documents(
+            write_part: Callable[[list], None]
+        ) -> Iterator[FixedAssetDocument]:
+        """
+        Dumps every batch of documents to the DB as it arrives, then passes
+        its documents on to the snapshot, so no batch is kept afterwards.
+        After the first error, the errors of the remaining batches are
+        collected and raised, dropping both the version and the snapshot.
+        """
+        errors = []
+        for batch_documents, batch_errors in _get(documents, stop):
+            errors.extend(batch_errors)
+            if not errors:
+                write_part(batch_documents)
+                yield from batch_documents
+        if errors:
+            raise RuntimeError(report_validation_errors(errors))
+
+    try:
+        with writer_lock():
+            with new_db_version() as write_part:
+                manifest = write_snapshot(stored_documents(write_part))
+            db_version = current_db_path().name
+            save_manifest(manifest)
+            if on_published is not None:
+                on_published(db_version)
+    except RuntimeError as e:
+        exit_with_info(f'{e}')
+    finally:
+        stop.set()
+    return db_version
@@ -0,0 +1,257 @@
+"""
+Content-addressed store of the imported data. Every import is kept
+as a snapshot, so we can tell what changed between any two of them.
+
+The store (SNAPSHOTS_DIR) looks like this:
+
+snapshots/
+    20240105-101500.json    the manifest: chunks of the snapshot in order
+    chunks/<hash>.gz        'key hash' lines, CHUNK_SIZE of them on average
+    records/<id>.gz         records first seen in snapshot <id>
+
+A record is hashed from its json, a chunk from its lines. Both are stored
+once, so an unchanged record (or a run of them) costs nothing in the next
+snapshot. Chunks end after the lines whose hash is a multiple of CHUNK_SIZE,
+not every CHUNK_SIZE lines, so adding or removing a record changes just
+the chunk it is in, not every chunk after it.
+"""
+
+from datetime import datetime
+from gzip import GzipFile, open as gzip_open
+from hashlib import blake2b
+from json import dump, load, loads
+from os import replace
+from pathlib import Path
+from typing import Generator, Iterable
+
+from .models import FixedAssetDocument
+
+
+SNAPSHOTS_DIR = 'snapshots'
+CHUNK_SIZE = 1024
+MAX_CHUNK_SIZE = 8 * CHUNK_SIZE
+
+
+def content_hash(data: bytes) -> str:
+    return blake2b(data, digest_size=16).hexdigest()
+
+def document_keys(
+        fixed_asset_documents: Iterable[FixedAssetDocument]
+    ) -> Generator[tuple[str, FixedAssetDocument], None, None]:
+    """
+    Yields the documents with their 'unit-serial' names. As serials may be
+    doubled, every repeated name gets the number of its occurrence,
+    e.g. 'unit-serial#2'.
+    """
+    seen = {}
+    for document in fixed_asset_documents:
+        key = f'{document.document_name_unit}-{document.document_name_serial}'
+        seen[key] = seen.get(key, 0) + 1
+        yield key if seen[key] == 1 else f'{key}#{seen[key]}', document
+
+def chunk_lines(lines: Iterable[str]) -> Generator[list[str], None, None]:
+    """
+    Yields the lines in chunks ending at the lines the content decides on,
+    see above, or at MAX_CHUNK_SIZE lines.
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        line_hash = blake2b(line.encode('utf-8'), digest_size=8).digest()
+        if (int.from_bytes(line_hash, 'big') % CHUNK_SIZE == 0
+            or len(chunk) >= MAX_CHUNK_SIZE):
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _write_gzipped(filename: Path, data: bytes) -> None:
+    """
+    Writes the data to a temporary file first, then renames it,
+    so the store never holds a partially written object.
+    """
+    temporary = filename.with_name(f'{filename.name}.tmp')
+    with open(temporary, 'wb') as stream:
+        with GzipFile(filename='', mode='wb', fileobj=stream, mtime=0) as gz:
+            gz.write(data)
+    replace(temporary, filename)
+
+def list_snapshots(path: str = SNAPSHOTS_DIR) -> list[str]:
+    """
+    Returns the ids of all snapshots, the oldest first.
+    """
+    return sorted(manifest.stem for manifest in Path(path).glob('*.json'))
+
+def load_manifest(snapshot_id: str, path: str = SNAPSHOTS_DIR) -> dict:
+    try:
+        with open(Path(path) / f'{snapshot_id}.json', encoding='utf-8') as f:
+            return load(f)
+    except FileNotFoundError as e:
+        raise RuntimeError(f'Snapshot {snapshot_id} does not exist.') from e
+
+def load_chunk(
+        chunk_hash: str, path: str = SNAPSHOTS_DIR
+    ) -> list[tuple[str, str]]:
+    """
+    Returns (key, record hash) pairs stored in the chunk.
+    """
+    with gzip_open(Path(path) / 'chunks' / f'{chunk_hash}.gz', 'rt',
+                   encoding='utf-8') as stream:
+        return [tuple(line.rsplit(' ', 1)) for line in stream.read().splitlines()]
+
+def write_snapshot(
+        fixed_asset_documents: Iterable[FixedAssetDocument],
+        path: str = SNAPSHOTS_DIR,
+    ) -> dict:
+    """
+    Stores the records and chunks of the documents not stored yet,
+    going through the documents once, so they may be generated meanwhile
+    and need not be kept in memory. The snapshot does not exist until
+    its manifest is saved, see save_manifest. If the documents raise,
+    whatever was stored is removed.
+
+    Returns:
+    dict: The manifest of the snapshot.
+    """
+    store = Path(path)
+    (store / 'chunks').mkdir(parents=True, exist_ok=True)
+    (store / 'records').mkdir(exist_ok=True)
+
+    snapshots = list_snapshots(path)
+    snapshot_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+    if snapshots and snapshots[-1] >= snapshot_id:
+        snapshot_id = f'{snapshots[-1]}-1'
+
+    known = set()
+    if snapshots:
+        for chunk_hash in load_manifest(snapshots[-1], path)['chunks']:
+            known.update(h for _, h in load_chunk(chunk_hash, path))
+
+    records_file = store / 'records' / f'{snapshot_id}.gz'
+    temporary = records_file.with_name(f'{records_file.name}.tmp')
+    count, new_records, chunks = 0, 0, []
+
+    def lines(gz: GzipFile) -> Generator[str, None, None]:
+        """
+        Yields the lines of the snapshot, writing the new records meanwhile.
+        """
+        nonlocal count, new_records
+        for key, document in document_keys(fixed_asset_documents):
+            record = document.model_dump_json()
+            record_hash = content_hash(record.encode('utf-8'))
+            count += 1
+            yield f'{key} {record_hash}'
+            if record_hash not in known:
+                known.add(record_hash)
+                gz.write(f'{record_hash} {record}\n'.encode('utf-8'))
+                new_records += 1
+
+    written = []
+    try:
+        with open(temporary, 'wb') as stream:
+            with GzipFile(
+                filename='', mode='wb', fileobj=stream, mtime=0
+            ) as gz:
+                for chunk in chunk_lines(lines(gz)):
+                    data = '\n'.join(chunk).encode('utf-8')
+                    chunk_hash = content_hash(data)
+                    filename = store / 'chunks' / f'{chunk_hash}.gz'
+                    if not filename.is_file():
+                        _write_gzipped(filename, data)
+                        written.append(filename)
+                    chunks.append(chunk_hash)
+        if new_records:
+            replace(temporary, records_file)
+    except BaseException:
+        # nothing of an unfinished snapshot is left behind, the snapshots
+        # are written holding the DB lock, so no other one shares the chunks
+        for filename in written:
+            filename.unlink(missing_ok=True)
+        raise
+    finally:
+        temporary.unlink(missing_ok=True)
+
+    return {
+        'id': snapshot_id,
+        'records': count,
+        'chunks': chunks,
+    }
+
+def save_manifest(manifest: dict, path: str = SNAPSHOTS_DIR) -> str:
+    """
+    Saves the manifest, making the snapshot exist.
+
+    Returns:
+    str: The id of the snapshot.
+    """
+    store = Path(path)
+    temporary = store / f'{manifest["id"]}.json.tmp'
+    with open(temporary, 'w', encoding='utf-8') as stream:
+        dump(manifest, stream, indent=1)
+    replace(temporary, store / f'{manifest["id"]}.json')
+    return manifest['id']
+
+def save_snapshot(
+        fixed_asset_documents: Iterable[FixedAssetDocument],
+        path: str = SNAPSHOTS_DIR,
+    ) -> str:
+    """
+    Stores the documents as a new snapshot. Only records and chunks
+    not stored yet are written.
+
+    Returns:
+    str: The id of the new snapshot.
+    """
+    return save_manifest(write_snapshot(fixed_asset_documents, path), path)
+
+def load_snapshot(
+        snapshot_id: str, path: str = SNAPSHOTS_DIR
+    ) -> list[FixedAssetDocument]:
+    """
+    Rebuilds the documents stored in the given snapshot.
+    """
+    entries = [
+        entry for chunk_hash in load_manifest(snapshot_id, path)['chunks']
+        for entry in load_chunk(chunk_hash, path)
+    ]
+    wanted = {record_hash for _, record_hash in entries}
+    records = {}
+    for pack in Path(path, 'records').glob('*.gz'):
+        with gzip_open(pack, 'rt', encoding='utf-8') as stream:
+            for line in stream:
+                record_hash, record = line.split(' ', 1)
+                if record_hash in wanted:
+                    records[record_hash] = record
+    return [
+        FixedAssetDocument.model_validate(loads(records[record_hash]))
+        for _, record_hash in entries
+    ]
+
+def diff_snapshots(
+        old_id: str, new_id: str, path: str = SNAPSHOTS_DIR
+    ) -> tuple[list[str], list[str], list[str]]:
+    """
+    Compares two snapshots by the hashes of their records, in linear time.
+    Chunks found in both snapshots hold the very same records (keys are
+    unique within a snapshot), so they are not even read.
+
+    Returns:
+    tuple: Sorted lists of added, removed and modified document names.
+    """
+    old_chunks = load_manifest(old_id, path)['chunks']
+    new_chunks = load_manifest(new_id, path)['chunks']
+    common = set(old_chunks) & set(new_chunks)
+    old, new = {}, {}
+    for chunk_hash in old_chunks:
+        if chunk_hash not in common:
+            old.update(load_chunk(chunk_hash, path))
+    for chunk_hash in new_chunks:
+        if chunk_hash not in common:
+            new.update(load_chunk(chunk_hash, path))
+
+    added = sorted(new.keys() - old.keys())
+    removed = sorted(old.keys() - new.keys())
+    modified = sorted(
+        key for key in new.keys() & old.keys() if new[key] != old[key]
+    )
+    return added, removed, modified
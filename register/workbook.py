@@ -1,8 +1,18 @@
-from typing import Any, Generator, cast
+from csv import Error as CSVError, reader as csv_reader
+from datetime import datetime
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Generator, Iterable, cast
 from openpyxl import load_workbook
 from openpyxl.workbook.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
+from .cache import (
+    cached_workbook,
+    load_cached_rows,
+    rows_cache_key,
+    save_cached_rows,
+)
 from .helpers import exit_with_info, user_input
 from .models import AppSettings
 
@@ -26,6 +36,24 @@ INDEXES = {
     'id_vim': 1,
 }
 
+# Layout of a remapped row - a tuple holding the values in order of INDEXES.
+# Use ROW_POSITION to get the position of a given key within such a tuple.
+ROW_LAYOUT = tuple(INDEXES)
+ROW_POSITION = {key: position for position, key in enumerate(ROW_LAYOUT)}
+
+remap_row = itemgetter(*INDEXES.values())
+
+# Cells of a CSV/TSV file are all text, the ones below are converted
+# to what openpyxl reads from the same cells of the workbook. Other numbers,
+# e.g. id_vim, end up as text in FixedAsset anyway, and converting them
+# would lose their leading zeros.
+CSV_DATES = tuple(ROW_POSITION[key] for key in ('date', 'invoice_date'))
+CSV_NUMBERS = tuple(ROW_POSITION[key] for key in ('ordinal_number', 'value'))
+CSV_DATE_FORMATS = (
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d-%m-%Y', '%d.%m.%Y', '%d/%m/%Y'
+)
+CSV_ROW_LENGTH = max(INDEXES.values()) + 1
+
 
 def setup_workbook(app_settings: AppSettings, files: list[str]) -> bool:
     """
@@ -62,13 +90,20 @@ def setup_workbook(app_settings: AppSettings, files: list[str]) -> bool:
 def get_workbook(filename) -> Workbook:
     """
     Loads an Excel file from the given location on your filesystem.
+    The file is opened from its local copy, see register.cache,
+    or from the location itself if it cannot be copied.
 
     Returns:
     Workbook: The current Excel file, or stops if it is not found.
     """
 
     try:
-        workbook = load_workbook(filename, read_only=True)
+        source = cached_workbook(filename)
+    except OSError:
+        # e.g. the cache cannot be written, a missing file is reported below
+        source = filename
+    try:
+        workbook = load_workbook(source, read_only=True)
     except FileNotFoundError:
         exit_with_info(
             f'Cannot find {filename}.\nPlease check your settings.'
@@ -76,7 +111,7 @@ def get_workbook(filename) -> Workbook:
     return workbook
 
 def obtain_cell_values_from_worksheet(
-        sheet: Worksheet, max_col) -> list[dict] | None:
+        sheet: Worksheet, max_col) -> list[tuple] | None:
     """
     Returns cell values from given dimensions
 
@@ -90,14 +125,13 @@ def obtain_cell_values_from_worksheet(
     return list(process_rows(rows))
 
 def process_rows(
-        rows: Generator[tuple[Any], None, None]
-    ) -> Generator[dict, None, None]:
+        rows: Iterable[tuple[Any]]
+    ) -> Generator[tuple, None, None]:
     """
     Processes excel's rows in order defined in INDEXES
-    Returns a generator of dictionaries.
+    Returns a generator of tuples laid out as ROW_LAYOUT.
     """
-    for row in rows:
-        yield {key: row[index] for key, index in INDEXES.items()}
+    yield from map(remap_row, rows)
 
 def obtain_last_data_column_from_worksheet(sheet: Worksheet) -> int:
     """
@@ -117,17 +151,72 @@ def obtain_last_data_column_from_worksheet(sheet: Worksheet) -> int:
         )
     return 0
 
-def read_workbook_data() -> list[dict[Any]]:
+def get_workbook_settings() -> AppSettings:
     """
-    Reads the data from the workbook and returns it as a list of dictionaries.
-    This is an aesy way to import data from a new workbook - simply remove
-    the 'wb_filename' entry from setting.txt dictionary stored on your disk
-    and start the program adding 'wb' as the parameter.
+    Returns the app settings, asking for the workbook if it is not set yet.
     """
     app_settings = AppSettings()
     if app_settings.wb_filename is None:
         files = app_settings.list_excel_files()
         setup_workbook(app_settings, files)
+    return app_settings
+
+def workbook_rows_key(app_settings: AppSettings) -> dict[str, Any] | None:
+    """
+    Returns the key the rows of the workbook are cached under,
+    None if the workbook is not there.
+    """
+    try:
+        return rows_cache_key(
+            app_settings.wb_filename,
+            app_settings.sheetname,
+            app_settings.last_column,
+            INDEXES,
+        )
+    except OSError:
+        return None
+
+def iter_workbook_data() -> Generator[tuple, None, None]:
+    """
+    Opens the workbook and returns a generator of its rows laid out as
+    ROW_LAYOUT, so they can be processed while the workbook is still being
+    read. The workbook is closed once all rows are read. Rows cached by
+    read_workbook_data are used if they are up to date.
+    """
+    app_settings = get_workbook_settings()
+    key = workbook_rows_key(app_settings)
+    if key and (cached_rows := load_cached_rows(key)) is not None:
+        return (row for row in cached_rows)
+
+    workbook: Workbook = get_workbook(app_settings.wb_filename)  # type: ignore
+    sheet = cast(Worksheet, workbook[app_settings.sheetname])
+
+    def rows() -> Generator[tuple, None, None]:
+        try:
+            yield from process_rows(
+                sheet.iter_rows(
+                    2, max_col=app_settings.last_column, values_only=True
+                )
+            )
+        finally:
+            workbook.close()
+
+    return rows()
+
+def read_workbook_data() -> list[tuple]:
+    """
+    Reads the data from the workbook and returns it as a list of tuples.
+    This is an aesy way to import data from a new workbook - simply remove
+    the 'wb_filename' entry from setting.txt dictionary stored on your disk
+    and start the program adding 'wb' as the parameter.
+
+    Rows are kept in a sidecar cache, so they are read from the workbook
+    only if it changed since (or the sheet, its columns or INDEXES did).
+    """
+    app_settings = get_workbook_settings()
+    key = workbook_rows_key(app_settings)
+    if key and (rows := load_cached_rows(key)) is not None:
+        return rows
 
     workbook: Workbook = get_workbook(app_settings.wb_filename)  # type: ignore
     rows = obtain_cell_values_from_worksheet(
@@ -135,4 +224,110 @@ def read_workbook_data() -> list[dict[Any]]:
         app_settings.last_column
     )
     workbook.close()
+    if key:
+        save_cached_rows(key, rows)
     return rows
+
+def csv_date(value: str) -> datetime | str:
+    """
+    Returns the datetime the cell holds, or the cell as is if it is not
+    a date in any of CSV_DATE_FORMATS, e.g. the 'date, date' literals.
+    """
+    for date_format in CSV_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            continue
+    return value
+
+def csv_number(value: str) -> int | float | str:
+    """
+    Returns the number the cell holds, an int if it is a whole one
+    as openpyxl does, or the cell as is if it is not a number.
+    Decimal commas are accepted.
+    """
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        number = float(value.replace(',', '.'))
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() else number
+
+def convert_csv_row(row: tuple) -> tuple:
+    """
+    Converts a row remapped from a CSV/TSV file, laid out as ROW_LAYOUT,
+    to the values of the same row read from the workbook.
+    """
+    row = [value or None for value in row]
+    for position in CSV_DATES:
+        if row[position] is not None:
+            row[position] = csv_date(row[position])
+    for position in CSV_NUMBERS:
+        if row[position] is not None:
+            row[position] = csv_number(row[position])
+    return tuple(row)
+
+def iter_csv_data(
+        filename: str | Path,
+        delimiter: str | None = None,
+        encoding: str = 'utf-8-sig',
+    ) -> Generator[tuple, None, None]:
+    """
+    Opens a CSV/TSV file holding the sheet of the workbook, exported
+    w/o any changes to its columns, and returns a generator of its rows
+    laid out as ROW_LAYOUT, the same as iter_workbook_data does.
+    The first row is the header and is skipped.
+
+    Parameters:
+    filename (str | Path): The CSV/TSV file.
+    delimiter (str): The delimiter of the cells, by default a tab
+    for .tsv files and a comma otherwise.
+    encoding (str): The encoding of the file, UTF-8 by default.
+
+    Raises:
+    RuntimeError: If the rows cannot be read or decoded.
+    """
+    if delimiter is None:
+        delimiter = '\t' if Path(filename).suffix.lower() == '.tsv' else ','
+    try:
+        stream = open(filename, encoding=encoding, newline='')
+    except (OSError, LookupError) as e:
+        exit_with_info(f'Cannot read {filename}: {e}')
+    padding = (None,) * CSV_ROW_LENGTH
+
+    def rows() -> Generator[tuple, None, None]:
+        try:
+            csv_rows = csv_reader(stream, delimiter=delimiter)
+            next(csv_rows, None)
+            yield from map(
+                convert_csv_row,
+                process_rows(
+                    row if len(row) >= CSV_ROW_LENGTH
+                    else tuple(row) + padding[len(row):]
+                    for row in csv_rows
+                ),
+            )
+        except (CSVError, UnicodeDecodeError) as e:
+            # raised, not exited on, as the rows may be read by a pipeline
+            # holding the DB lock, see register.pipeline
+            raise RuntimeError(f'Cannot read {filename}: {e}') from e
+        finally:
+            stream.close()
+
+    return rows()
+
+def read_csv_data(
+        filename: str | Path,
+        delimiter: str | None = None,
+        encoding: str = 'utf-8-sig',
+    ) -> list[tuple]:
+    """
+    Reads the data from a CSV/TSV file, see iter_csv_data.
+
+    Raises:
+    RuntimeError: If the rows cannot be read or decoded.
+    """
+    return list(iter_csv_data(filename, delimiter, encoding))
@@ -0,0 +1,10 @@
+import pytest
+
+from ..register import cache
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Keeps the workbooks and rows cached by any test in its own directory.
+    """
+    monkeypatch.setattr(cache, 'CACHE_DIR', tmp_path / 'cache')
@@ -0,0 +1,134 @@
+from collections import deque
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from ..register import checkpoint
+from ..register.checkpoint import (
+    CHECKPOINT_WINDOW,
+    append_workbook_data,
+    load_checkpoint,
+    make_checkpoint,
+    save_checkpoint,
+    track_tail,
+)
+from ..register.database import DB_LOCK, current_db_path
+from ..register.functions import load_fixed_assets, process_workbook_data
+from ..register.models import AppSettings
+from ..register.workbook import read_workbook_data
+from .test_memory_budget import make_register
+from .test_row_remapping import worksheet_row
+
+def import_workbook() -> None:
+    """
+    A full import, recording the checkpoint as import-wb does,
+    still holding the DB lock.
+    """
+    tail = deque(maxlen=CHECKPOINT_WINDOW)
+
+    def save_import_checkpoint(db_version: str) -> None:
+        assert Path(DB_LOCK).exists()
+        save_checkpoint(make_checkpoint(tail, AppSettings(), db_version))
+
+    process_workbook_data(
+        list(track_tail(read_workbook_data(), tail)),
+        on_published=save_import_checkpoint,
+    )
+
+def append_rows(path, serials: range) -> None:
+    workbook = load_workbook(path / 'register.xlsx')
+    for serial in serials:
+        row = list(worksheet_row[:16])
+        row[0] = serial + 1
+        row[2] = f'487-T-1110300-111100{serial:06d}'
+        workbook.active.append(row)
+    workbook.save(path / 'register.xlsx')
+
+def test_tail_ends_at_last_row_with_data():
+    """
+    Empty rows at the bottom of the sheet are not part of the tail.
+    """
+    rows = [(i,) for i in range(10)] + [(None,)] * 30
+    tail = deque(maxlen=4)
+    assert list(track_tail(rows, tail)) == rows
+    assert list(tail) == [(8, (6,)), (9, (7,)), (10, (8,)), (11, (9,))]
+
+def test_appended_rows_imported(tmp_path, monkeypatch):
+    """
+    Only the rows below the checkpoint are read, their documents
+    are added to the ones already in the DB.
+    """
+    make_register(tmp_path, 50)
+    monkeypatch.chdir(tmp_path)
+    import_workbook()
+    assert len(load_fixed_assets()) == 50
+
+    append_rows(tmp_path, range(50, 55))
+    assert append_workbook_data() is None
+    fixed_assets = load_fixed_assets()
+    assert len(fixed_assets) == 55
+    assert fixed_assets[-1].document_name_serial == '000054'
+
+    assert append_workbook_data() is None
+    assert len(load_fixed_assets()) == 55
+
+def test_changed_window_needs_full_import(tmp_path, monkeypatch):
+    """
+    If any row of the trailing window changed, nothing is appended.
+    """
+    make_register(tmp_path, 50)
+    monkeypatch.chdir(tmp_path)
+    import_workbook()
+
+    workbook = load_workbook(tmp_path / 'register.xlsx')
+    workbook.active['G50'] = 'Changed'
+    workbook.save(tmp_path / 'register.xlsx')
+    append_rows(tmp_path, range(50, 55))
+    assert append_workbook_data() == 'The last rows imported changed since.'
+    assert len(load_fixed_assets()) == 50
+
+def test_import_published_meanwhile_not_lost(tmp_path, monkeypatch):
+    """
+    If another import publishes while the appended rows are validated,
+    nothing is appended to the older version.
+    """
+    make_register(tmp_path, 50)
+    monkeypatch.chdir(tmp_path)
+    import_workbook()
+    append_rows(tmp_path, range(50, 55))
+
+    select_fixed_asset_documents = checkpoint.select_fixed_asset_documents
+
+    def select_and_import(*args):
+        documents = select_fixed_asset_documents(*args)
+        process_workbook_data(read_workbook_data()[:10])
+        return documents
+
+    monkeypatch.setattr(
+        checkpoint, 'select_fixed_asset_documents', select_and_import
+    )
+    assert 'meanwhile' in append_workbook_data()
+    assert len(load_fixed_assets()) == 10
+
+def test_checkpoint_names_version_imported(tmp_path, monkeypatch):
+    """
+    The checkpoint names the DB version of its import, not the one
+    published by the next import.
+    """
+    make_register(tmp_path, 50)
+    monkeypatch.chdir(tmp_path)
+    import_workbook()
+    db_version = current_db_path().name
+    process_workbook_data(read_workbook_data()[:10])
+    assert load_checkpoint()['db_version'] == db_version
+    assert 'another import' in append_workbook_data()
+
+def test_no_checkpoint_reported(tmp_path, monkeypatch):
+    """
+    Before the first import there is nothing to append to, and that is
+    the reason given, not a changed workbook.
+    """
+    make_register(tmp_path, 5)
+    monkeypatch.chdir(tmp_path)
+    assert append_workbook_data() == \
+        'There is no checkpoint of the last import.'
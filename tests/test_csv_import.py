@@ -0,0 +1,137 @@
+from csv import writer
+from datetime import datetime
+
+import pytest
+from openpyxl import load_workbook
+
+from ..register import pipeline
+from ..register.database import DB_LOCK, DB_VERSIONS
+from ..register.functions import (
+    load_fixed_assets,
+    process_workbook_data,
+    select_fixed_asset_documents,
+)
+from ..register.workbook import (
+    ROW_POSITION,
+    convert_csv_row,
+    iter_csv_data,
+    process_rows,
+    read_csv_data,
+    read_workbook_data,
+)
+from .test_memory_budget import make_register
+from .test_row_remapping import worksheet_row
+
+ID_VIM = ROW_POSITION['id_vim']
+
+
+def export_register(path, filename: str, delimiter: str) -> None:
+    """
+    Exports the sheet of register.xlsx the way an ERP does: dates
+    as DD.MM.YYYY, decimal commas and empty cells for no values.
+    """
+    workbook = load_workbook(path / 'register.xlsx', read_only=True)
+    with open(path / filename, 'w', encoding='utf-8', newline='') as stream:
+        csv_writer = writer(stream, delimiter=delimiter)
+        for row in workbook['Środki Trwałe'].iter_rows(values_only=True):
+            csv_writer.writerow(
+                value.strftime('%d.%m.%Y') if isinstance(value, datetime)
+                else str(value).replace('.', ',') if isinstance(value, float)
+                else '' if value is None
+                else value
+                for value in row
+            )
+    workbook.close()
+
+@pytest.mark.parametrize('filename, delimiter', [
+    ('register.csv', ','),
+    ('register.tsv', '\t'),
+])
+def test_csv_rows_same_as_workbook_rows(
+        filename, delimiter, tmp_path, monkeypatch
+    ):
+    """
+    Rows read from the exported sheet are the rows read from the workbook,
+    but id_vim left as text, the delimiter following the file's extension.
+    """
+    make_register(tmp_path, 50)
+    export_register(tmp_path, filename, delimiter)
+    monkeypatch.chdir(tmp_path)
+
+    rows = [
+        row[:ID_VIM] + (str(row[ID_VIM]),) + row[ID_VIM + 1:]
+        for row in read_workbook_data()
+    ]
+    assert read_csv_data(tmp_path / filename) == rows
+    assert list(iter_csv_data(tmp_path / filename, delimiter)) == rows
+
+def test_csv_import_same_as_workbook_import(tmp_path, monkeypatch):
+    """
+    Importing the exported sheet stores the same documents
+    as importing the workbook.
+    """
+    make_register(tmp_path, 50)
+    export_register(tmp_path, 'register.csv', ',')
+    monkeypatch.chdir(tmp_path)
+
+    process_workbook_data(read_workbook_data())
+    imported = load_fixed_assets()
+    process_workbook_data(read_csv_data(tmp_path / 'register.csv'))
+    assert load_fixed_assets() == imported
+    assert len(imported) == 50
+
+def test_csv_cells_converted():
+    """
+    Empty cells are None, dates and numbers are converted as openpyxl
+    reads them, anything else is left as is.
+    """
+    cells = ('7', '054260', '487-T', 'S', 'F/1', '2023-12-15', 'Laptop', '1',
+             '1537,00', '', 'STATIM', 'date, date', 'D111/1', '', 'x', '')
+    row, = process_rows([cells])
+    assert convert_csv_row(row) == tuple(process_rows([(
+        7, '054260', '487-T', 'S', 'F/1', datetime(2023, 12, 15), 'Laptop', '1',
+        1537, None, 'STATIM', 'date, date', 'D111/1', None, 'x', None,
+    )]))[0]
+
+def test_undecodable_csv_leaves_no_lock(tmp_path, monkeypatch):
+    """
+    A file failing to decode halfway through a pipelined import stops it
+    with the DB lock released and the new version dropped.
+    """
+    make_register(tmp_path, 1200)
+    export_register(tmp_path, 'register.csv', ',')
+    with open(tmp_path / 'register.csv', 'a', encoding='utf-8') as stream:
+        stream.write('51,Żółw\n')
+    monkeypatch.chdir(tmp_path)
+
+    def exit_with_info(info):
+        raise SystemExit(info)
+
+    monkeypatch.setattr(pipeline, 'exit_with_info', exit_with_info)
+    with pytest.raises(SystemExit, match='Cannot read'):
+        pipeline.import_pipelined(
+            iter_csv_data(tmp_path / 'register.csv', encoding='ascii')
+        )
+    assert not (tmp_path / DB_LOCK).exists()
+    assert not list(tmp_path.glob(f'{DB_VERSIONS}/*.tmp'))
+
+def test_leading_zeros_kept(tmp_path):
+    """
+    A text id_vim with leading zeros is imported the same from both sources.
+    """
+    row = (1, '054260') + worksheet_row[2:16]
+    with open(tmp_path / 'register.csv', 'w', encoding='utf-8') as stream:
+        csv_writer = writer(stream)
+        csv_writer.writerow(f'Column {i}' for i in range(1, 17))
+        csv_writer.writerow(
+            value.strftime('%Y-%m-%d') if isinstance(value, datetime)
+            else value
+            for value in row
+        )
+    document, = select_fixed_asset_documents(
+        read_csv_data(tmp_path / 'register.csv')
+    )
+    assert [document] == select_fixed_asset_documents(
+        list(process_rows([row]))
+    )
+    assert document.fixed_asset.id_vim == '054260'
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+from ..register import database
+from ..register.database import (
+    DB_LOCK,
+    DB_VERSIONS,
+    FILE_DB,
+    KEEP_VERSIONS,
+    current_db_path,
+    open_db,
+    publish_db,
+    read_db,
+    read_db_part,
+    read_db_parts,
+    writer_lock,
+)
+
+def test_reader_keeps_its_version(tmp_path, monkeypatch):
+    """
+    A reader which opened the DB keeps reading the same version,
+    while a new one gets published.
+    """
+    monkeypatch.chdir(tmp_path)
+    with writer_lock():
+        publish_db(['first'])
+    with open_db() as reader:
+        with writer_lock():
+            publish_db(['second'])
+        assert read_db(reader) == ['first']
+    with open_db() as reader:
+        assert read_db(reader) == ['second']
+
+def test_old_versions_pruned(tmp_path, monkeypatch):
+    """
+    Only KEEP_VERSIONS latest versions are kept.
+    """
+    monkeypatch.chdir(tmp_path)
+    for version in range(KEEP_VERSIONS + 2):
+        with writer_lock():
+            publish_db([version])
+    assert current_db_path().name == f'{KEEP_VERSIONS + 2:06d}.db'
+    assert len(list(Path(DB_VERSIONS).glob('*.db'))) == KEEP_VERSIONS
+
+def test_db_written_before_versioning(tmp_path, monkeypatch):
+    """
+    A DB written in place by an older version of the app is still read.
+    """
+    monkeypatch.chdir(tmp_path)
+    assert current_db_path() == Path(FILE_DB)
+
+def test_writers_serialized(tmp_path, monkeypatch):
+    """
+    A writer cannot take the lock held by another one.
+    """
+    monkeypatch.chdir(tmp_path)
+    with writer_lock():
+        try:
+            with writer_lock(timeout=0):
+                assert False
+        except RuntimeError as e:
+            assert DB_LOCK in str(e)
+    assert not Path(DB_LOCK).exists()
+
+def test_db_read_in_parts(tmp_path, monkeypatch):
+    """
+    A version is written in parts of PART_SIZE items, any of which
+    can be read alone, and all of them together.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, 'PART_SIZE', 1000)
+    with writer_lock():
+        publish_db(list(range(2500)))
+
+    parts = read_db_parts(current_db_path())
+    assert [(first, count) for first, _, count in parts] == [
+        (0, 1000), (1000, 1000), (2000, 500)
+    ]
+    assert read_db_part(current_db_path(), parts[1][1]) == \
+        list(range(1000, 2000))
+    with open_db() as reader:
+        assert read_db(reader) == list(range(2500))
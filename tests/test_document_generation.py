@@ -0,0 +1,242 @@
+from datetime import datetime
+from json import dump
+from pathlib import Path
+from shutil import copy
+from threading import Thread
+from time import sleep
+
+import pytest
+
+from ..register import database, functions
+from ..register.database import (
+    current_db_path,
+    file_lock,
+    publish_db,
+    writer_lock,
+)
+from ..register.documents import (
+    FA_INDEX_LOCK,
+    find_documents,
+    load_document_index,
+    migrate_documents,
+    save_document_index,
+    update_document_index,
+)
+from ..register.functions import (
+    generate_fixed_asset_document,
+    generate_fixed_asset_documents,
+    load_fixed_assets,
+    select_document_indices,
+    select_fixed_asset_documents,
+)
+from ..register.models import AppSettings
+from .test_row_remapping import make_rows
+
+TEMPLATE = Path(__file__).parent.parent / 'FA_template.xlsx'
+
+@pytest.fixture
+def register(tmp_path, monkeypatch):
+    """
+    A DB of a few documents and the template in the current directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    copy(TEMPLATE, tmp_path)
+    with writer_lock():
+        publish_db(select_fixed_asset_documents(make_rows(9)))
+    return load_fixed_assets()
+
+def test_all_documents_generated(register, tmp_path):
+    """
+    Workers make every document, reading them from the DB by index,
+    and the documents made are indexed.
+    """
+    (tmp_path / 'FA_documents').mkdir()
+    generate_fixed_asset_document(register, '--all', processes=2)
+    assert sorted(p.name for p in (tmp_path / 'FA_documents').glob('*.xlsx')) == [
+        f'D111_1-{d.document_name_serial}.xlsx' for d in register
+    ]
+    assert find_documents(tmp_path / 'FA_documents', '000003') == [
+        tmp_path / 'FA_documents' / 'D111_1-000003.xlsx'
+    ]
+
+def test_serial_of_many_units_indexed(tmp_path):
+    """
+    The documents of a serial repeated across units are all indexed.
+    """
+    update_document_index(tmp_path, [('000003', 'D111_1-000003.xlsx')])
+    update_document_index(tmp_path, [
+        ('000003', 'D222_2-000003.xlsx'), ('000003', 'D111_1-000003.xlsx')
+    ])
+    assert find_documents(tmp_path, '000003') == [
+        tmp_path / 'D111_1-000003.xlsx', tmp_path / 'D222_2-000003.xlsx'
+    ]
+
+def test_index_updated_holding_lock(tmp_path):
+    """
+    The index is not read nor written while another run holds its lock,
+    so no document indexed by that run gets lost.
+    """
+    with file_lock(tmp_path / FA_INDEX_LOCK, 'test'):
+        update = Thread(target=update_document_index, args=(
+            tmp_path, [('000001', 'D111_1-000001.xlsx')]
+        ))
+        update.start()
+        sleep(0.2)
+        # the run holding the lock rewrites the index meanwhile
+        index = load_document_index(tmp_path)
+        index['000000'] = ['D111_1-000000.xlsx']
+        save_document_index(tmp_path, index)
+    update.join()
+    assert load_document_index(tmp_path) == {
+        '000000': ['D111_1-000000.xlsx'],
+        '000001': ['D111_1-000001.xlsx'],
+    }
+
+def test_documents_selected_by_serials_and_filters(register):
+    """
+    Serials and filters select the documents in one pass over the DB,
+    the serials not found are returned.
+    """
+    register[1].document_name_unit = 'D222_2'
+    register[2].fixed_asset.cost_center = '1234'
+    register[3].fixed_asset.date = '01-02-2022'
+    serials = [d.document_name_serial for d in register]
+
+    assert select_document_indices(register, serials[:3] + ['999999']) == \
+        ([0, 1, 2], {'999999'})
+    assert select_document_indices(register, units=['D222/2']) == ([1], set())
+    assert select_document_indices(register, cost_centers=['1234']) == \
+        ([2], set())
+    assert select_document_indices(
+        register,
+        serials[2:5],
+        date_from=datetime(2022, 1, 1),
+        date_to=datetime(2022, 12, 31),
+    ) == ([3], set())
+    assert select_document_indices(register)[0] == list(range(len(register)))
+
+def test_many_documents_generated_in_one_run(register, tmp_path):
+    """
+    The documents selected are made in a single run of the pool.
+    """
+    (tmp_path / 'FA_documents').mkdir()
+    indices, _ = select_document_indices(register, ['000000', '000004'])
+    generate_fixed_asset_documents(indices, processes=2)
+    assert load_document_index(tmp_path / 'FA_documents') == {
+        '000000': ['D111_1-000000.xlsx'],
+        '000004': ['D111_1-000004.xlsx'],
+    }
+
+def test_failures_reported_at_the_end(register, capsys, monkeypatch):
+    """
+    Without the output directory every document fails, each of them
+    is reported and the batch is not aborted on the first one.
+    """
+    def exit_with_info(info):
+        print(info)
+        raise SystemExit(1)
+
+    monkeypatch.setattr(functions, 'exit_with_info', exit_with_info)
+    with pytest.raises(SystemExit):
+        generate_fixed_asset_document(register, '--all', processes=2)
+    out = capsys.readouterr().out
+    assert out.count('No such file or directory') == len(register)
+    assert f'{len(register)} of {len(register)} documents' in out
+
+def test_documents_laid_out_and_migrated(register, tmp_path):
+    """
+    Documents go to the directories of the layout set, and the ones
+    already made are moved there when the layout changes.
+    """
+    (tmp_path / 'FA_documents').mkdir()
+    generate_fixed_asset_document(register, '000000', processes=1)
+
+    with open(tmp_path / 'settings.txt', 'w', encoding='utf-8') as settings:
+        dump({
+            'data_path': str(tmp_path),
+            'fa_layout': 'unit/year',
+            'fa_shards': 16,
+        }, settings)
+    generate_fixed_asset_document(register, '000001', processes=1)
+    assert migrate_documents(register, AppSettings()) == 1
+
+    index = load_document_index(tmp_path / 'FA_documents')
+    assert index == {
+        '000000': ['D111_1/2023/06/D111_1-000000.xlsx'],
+        '000001': ['D111_1/2023/00/D111_1-000001.xlsx'],
+    }
+    for [path] in index.values():
+        assert (tmp_path / 'FA_documents' / path).is_file()
+
+def test_unreadable_db_reported(tmp_path, capsys, monkeypatch):
+    """
+    Workers which cannot read the DB report why for every document
+    instead of being restarted over and over.
+    """
+    def exit_with_info(info):
+        print(info)
+        raise SystemExit(1)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(functions, 'exit_with_info', exit_with_info)
+    (tmp_path / 'bad.db').write_bytes(b'garbage')
+    with pytest.raises(SystemExit):
+        generate_fixed_asset_documents([0, 1], tmp_path / 'bad.db', 2)
+    out = capsys.readouterr().out
+    assert out.count('Cannot read') == 2
+    assert '2 of 2 documents' in out
+
+@pytest.mark.parametrize('settings, error', [
+    ({'fa_layout': 'bogus'}, 'fa_layout must be one of'),
+    ({'fa_shards': -1}, 'greater than or equal to 0'),
+])
+def test_layout_settings_validated(
+        settings, error, register, tmp_path, monkeypatch
+    ):
+    """
+    Layout settings edited in settings.txt are validated when loaded,
+    before any document is made.
+    """
+    def exit_with_info(info):
+        raise SystemExit(info)
+
+    monkeypatch.setattr(functions, 'exit_with_info', exit_with_info)
+    with open(tmp_path / 'settings.txt', 'w', encoding='utf-8') as stream:
+        dump({'data_path': str(tmp_path), **settings}, stream)
+    with pytest.raises(SystemExit, match=error):
+        generate_fixed_asset_document(register, '--all', processes=1)
+
+def test_layout_settings_coerced(tmp_path, monkeypatch):
+    """
+    The number of shards may be given as a string.
+    """
+    monkeypatch.chdir(tmp_path)
+    with open(tmp_path / 'settings.txt', 'w', encoding='utf-8') as stream:
+        dump({'data_path': str(tmp_path), 'fa_shards': '16'}, stream)
+    assert AppSettings().fa_shards == 16
+
+def test_worker_reads_only_parts_needed(tmp_path, monkeypatch):
+    """
+    A worker reads the parts of the DB holding the documents it makes,
+    not the whole DB, unless the DB has no table of parts.
+    """
+    # pylint: disable=protected-access
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(database, 'PART_SIZE', 2)
+    with writer_lock():
+        publish_db(select_fixed_asset_documents(make_rows(9)))
+    documents = load_fixed_assets()
+
+    for name in ('_worker_db', '_worker_parts', '_worker_part'):
+        monkeypatch.setattr(functions, name, getattr(functions, name))
+    functions._load_worker_documents(current_db_path())
+    assert functions._worker_part == (-1, [])
+    assert functions._worker_document(5) == documents[5]
+    assert functions._worker_part == (2, documents[4:6])
+    with pytest.raises(IndexError):
+        functions._worker_document(len(documents))
+
+    database.parts_path(current_db_path()).unlink()
+    functions._load_worker_documents(current_db_path())
+    assert functions._worker_part == (0, documents)
+    assert functions._worker_document(5) == documents[5]
@@ -0,0 +1,50 @@
+from csv import DictReader
+from gzip import open as gzip_open
+from json import loads
+
+from ..register.export import export_fixed_assets, select_export_fields
+from ..register.functions import select_fixed_asset_documents
+from .test_row_remapping import make_rows
+
+def test_export_is_reproducible(tmp_path):
+    """
+    Exporting the same data twice gives byte-for-byte the same file,
+    also when it is gzipped and written in many chunks.
+    """
+    documents = select_fixed_asset_documents(make_rows(30))
+    first, second = tmp_path / 'first.csv.gz', tmp_path / 'second.csv.gz'
+    export_fixed_assets(documents, first, compress=True, chunk_size=7)
+    export_fixed_assets(documents, second, compress=True)
+    assert first.read_bytes() == second.read_bytes()
+
+    with gzip_open(first, 'rt', encoding='utf-8') as stream:
+        records = list(DictReader(stream))
+    assert len(records) == len(documents)
+    assert records[0]['document_name_serial'] == '000000'
+
+def test_export_selected_fields_with_gdpr(tmp_path):
+    """
+    Only the selected fields are exported, in the given order,
+    and material duty person is hidden without changing the documents.
+    """
+    documents = select_fixed_asset_documents(make_rows(3))
+    filename = tmp_path / 'export.jsonl'
+    fields = select_export_fields('document_name_serial,material_duty_person')
+    export_fixed_assets(documents, filename, 'jsonl', fields, gdpr=True)
+    records = [loads(line) for line in filename.read_text('utf-8').splitlines()]
+    assert records == [
+        {'document_name_serial': '000000', 'material_duty_person': 'GDPR'},
+        {'document_name_serial': '000001', 'material_duty_person': 'GDPR'},
+    ]
+    assert documents[0].fixed_asset.material_duty_person == 'Johny B.'
+
+def test_unknown_export_field():
+    """
+    Asking for a field which does not exist is an error.
+    """
+    try:
+        select_export_fields('serial')
+    except ValueError as e:
+        assert 'serial' in str(e)
+    else:
+        assert False
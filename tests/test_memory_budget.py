@@ -0,0 +1,102 @@
+from contextlib import redirect_stdout
+from json import dump
+from os import devnull
+from tracemalloc import get_traced_memory, reset_peak, start, stop
+
+import pytest
+from openpyxl.workbook.workbook import Workbook
+
+from ..register.functions import (
+    load_fixed_assets,
+    print_fixed_assets,
+    process_workbook_data,
+    select_fixed_asset_documents,
+)
+from ..register.workbook import read_workbook_data
+from .test_row_remapping import worksheet_row
+
+SIZES = (100, 500, 2000)
+
+# Peak bytes allocated per asset (row) by each stage, plus what
+# any stage may allocate regardless of the size of the register.
+BUDGETS = {
+    'read_workbook_data': 1_500,
+    'select_fixed_asset_documents': 2_500,
+    'process_workbook_data': 4_500,
+    'load_fixed_assets': 3_000,
+    'print_fixed_assets': 100,
+}
+OVERHEAD = 1_000_000
+
+
+def make_register(path, size: int) -> None:
+    """
+    Makes a workbook with a register of the given size and the settings
+    pointing to it.
+    """
+    wb = Workbook()
+    sheet = wb.active
+    sheet.title = 'Środki Trwałe'
+    sheet.append([f'Column {i}' for i in range(1, 17)])
+    for i in range(size):
+        row = list(worksheet_row[:16])
+        row[0] = i + 1
+        row[2] = f'487-T-1110300-111100{i:06d}'
+        sheet.append(row)
+    wb.save(path / 'register.xlsx')
+
+    with open(path / 'settings.txt', 'w', encoding='utf-8') as settings:
+        dump({
+            'data_path': str(path),
+            'wb_filename': str(path / 'register.xlsx'),
+            'sheetname': 'Środki Trwałe',
+            'last_column': 16,
+            'configured': True,
+        }, settings)
+
+def measure(function, *args):
+    """
+    Returns the result of the function and the peak of memory
+    it allocated meanwhile.
+    """
+    reset_peak()
+    before, _ = get_traced_memory()
+    result = function(*args)
+    _, peak = get_traced_memory()
+    return result, peak - before
+
+@pytest.mark.parametrize('size', SIZES)
+def test_memory_budget(size, tmp_path, monkeypatch, record_property):
+    """
+    Runs the import and the report on registers of various sizes, checking
+    the peak memory of every stage against its budget. Bytes per asset
+    are recorded, run pytest with '-rP' or '--junitxml' to see them.
+    """
+    make_register(tmp_path, size)
+    monkeypatch.chdir(tmp_path)
+
+    peaks = {}
+    start()
+    try:
+        rows, peaks['read_workbook_data'] = measure(read_workbook_data)
+        documents, peaks['select_fixed_asset_documents'] = measure(
+            select_fixed_asset_documents, rows
+        )
+        del documents
+        _, peaks['process_workbook_data'] = measure(process_workbook_data, rows)
+        del rows
+        fixed_assets, peaks['load_fixed_assets'] = measure(load_fixed_assets)
+        with open(devnull, 'w', encoding='utf-8') as stream:
+            with redirect_stdout(stream):
+                _, peaks['print_fixed_assets'] = measure(
+                    print_fixed_assets, fixed_assets, True
+                )
+    finally:
+        stop()
+
+    assert len(fixed_assets) == size
+    for stage, peak in peaks.items():
+        per_asset = peak // size
+        record_property(f'{stage} bytes per asset', per_asset)
+        print(f'{size} assets, {stage}: {peak} B peak, {per_asset} B/asset')
+        assert peak <= OVERHEAD + BUDGETS[stage] * size, stage
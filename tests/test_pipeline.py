@@ -0,0 +1,123 @@
+from pathlib import Path
+from time import sleep
+from tracemalloc import get_traced_memory, reset_peak, start, stop
+from typing import Iterator
+
+import pytest
+
+from ..register import pipeline
+from ..register.functions import load_fixed_assets, select_fixed_asset_documents
+from ..register.pipeline import import_pipelined
+from ..register.snapshots import SNAPSHOTS_DIR
+from .test_row_remapping import make_rows
+
+def test_pipelined_import_same_as_serial(tmp_path, monkeypatch):
+    """
+    The rows read, validated and written in many batches at the same time
+    make the very same DB as the serial import does.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, 'BATCH_SIZE', 50)
+    rows = make_rows(1000)
+    expected = select_fixed_asset_documents(rows)
+
+    import_pipelined(iter(rows))
+    assert load_fixed_assets() == expected
+
+    import_pipelined(iter(rows), processes=2)
+    assert load_fixed_assets() == expected
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_failed_import_leaves_nothing(processes, tmp_path, monkeypatch):
+    """
+    An import failing on the rows validated after some batches were written
+    leaves neither a DB version nor anything of its snapshot in the store.
+    """
+    def exit_with_info(info):
+        raise SystemExit(info)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, 'BATCH_SIZE', 50)
+    monkeypatch.setattr(pipeline, 'exit_with_info', exit_with_info)
+    rows = make_rows(1000)
+    import_pipelined(iter(rows[:300]))
+    stored = sorted(Path(SNAPSHOTS_DIR).rglob('*'))
+    expected = load_fixed_assets()
+
+    rows = [
+        row[:3] + ('31st of June',) + row[4:] if i in {600, 900} else row
+        for i, row in enumerate(rows)
+    ]
+    with pytest.raises(SystemExit, match='^2 rows did not pass'):
+        import_pipelined(iter(rows), processes, collect_errors=True)
+    assert sorted(Path(SNAPSHOTS_DIR).rglob('*')) == stored
+    assert load_fixed_assets() == expected
+
+def slow_writer(monkeypatch, read: list[int]) -> None:
+    """
+    Makes the writer wait a bit on every batch, recording how many rows
+    the reader has read by then, with the number of documents written.
+    """
+    write_snapshot = pipeline.write_snapshot
+
+    def slow(documents):
+        for i, document in enumerate(documents):
+            if i % pipeline.BATCH_SIZE == 0:
+                read.append((read[0], i))
+                sleep(0.01)
+            yield document
+
+    monkeypatch.setattr(
+        pipeline, 'write_snapshot', lambda documents: write_snapshot(
+            slow(documents)
+        )
+    )
+
+def counted(rows: list[tuple], read: list[int]) -> Iterator[tuple]:
+    for row in rows:
+        read[0] += 1
+        yield row
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_reader_held_back_by_writer(processes, tmp_path, monkeypatch):
+    """
+    The reader gets just a few batches ahead of a slow writer,
+    whether the batches are validated in this process or in a pool.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, 'BATCH_SIZE', 50)
+    monkeypatch.setattr(pipeline, 'QUEUE_SIZE', 2)
+    read = [0]
+    slow_writer(monkeypatch, read)
+
+    import_pipelined(counted(make_rows(6000), read), processes)
+    # make_rows makes 2 documents of every 3 rows
+    ahead = [rows - written * 3 // 2 for rows, written in read[1:]]
+    assert max(ahead) < 50 * 12
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_pipelined_import_memory_bounded(processes, tmp_path, monkeypatch):
+    """
+    Documents are not kept once written, so the peak memory of the import
+    hardly grows with the number of rows, even with a slow writer.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, 'BATCH_SIZE', 50)
+    small, large = make_rows(600), make_rows(3000)
+    slow_writer(monkeypatch, [0])
+
+    peaks = []
+    start()
+    try:
+        for rows in (small, large):
+            reset_peak()
+            before, _ = get_traced_memory()
+            import_pipelined(iter(rows), processes)
+            _, peak = get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        stop()
+
+    per_document = (peaks[1] - peaks[0]) // (len(large) - len(small))
+    print(f'{peaks} B peak, {per_document} B per document more')
+    assert per_document < 700
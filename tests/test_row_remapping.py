@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from ..register.financial_sources import FINANCIAL_SOURCES
+from ..register.functions import select_fixed_asset_documents, shard_rows
+from ..register.workbook import INDEXES, process_rows
+
+worksheet_row = (
+    1,
+    54260,
+    '487-T-1110300-111100140070',
+    '550-D111-00-1110000',
+    'F/174/06/2023',
+    datetime(2023, 12, 15),
+    'Dell Latitude 5440 laptop',
+    1,
+    1537.99,
+    1537.99,
+    'STATIM LLC',
+    datetime(2023, 12, 19),
+    'D111/1',
+    'Johny B.',
+    'science',
+    '12zx-56Qk7',
+    None,
+    None,
+)
+
+def test_row_remapped_in_order_of_indexes():
+    """
+    A remapped row is a tuple holding the cell values in order of INDEXES.
+    """
+    row, = process_rows([worksheet_row])
+    assert row == tuple(worksheet_row[index] for index in INDEXES.values())
+
+def test_psp_and_cost_center_filled_from_financial_sources():
+    """
+    The remapped row goes straight to the FixedAsset, with psp and cost_center
+    taken from FINANCIAL_SOURCES, as the financial source is known.
+    """
+    document, = select_fixed_asset_documents(list(process_rows([worksheet_row])))
+    source = FINANCIAL_SOURCES['550-D111-00-1110000']
+    assert document.document_name_unit == 'D111_1'
+    assert document.document_name_serial == '140070'
+    assert document.fixed_asset.psp == source['psp']
+    assert document.fixed_asset.cost_center == source['cost_center']
+    assert document.fixed_asset.date == '19-12-2023'
+    assert document.fixed_asset.invoice_date == '15-12-2023'
+    assert document.fixed_asset.id_vim == '54260'
+
+def test_rows_without_document_skipped():
+    """
+    Rows without ordinal number or those financed from a 'P' source
+    do not make any document.
+    """
+    no_ordinal_number = (None,) + worksheet_row[1:]
+    p_source = worksheet_row[:3] + ('P-source',) + worksheet_row[4:]
+    rows = list(process_rows([no_ordinal_number, p_source]))
+    assert not select_fixed_asset_documents(rows)
+
+def make_rows(count: int) -> list[tuple]:
+    """
+    Makes a register of rows grouped by ordinal number, every third row
+    continuing the group of the previous one with the ordinal number skipped.
+    """
+    rows = []
+    for i in range(count):
+        ordinal_number = None if i % 3 == 2 else i // 3 + 1
+        inventory_number = f'487-T-1110300-111100{i:06d}'
+        rows.append(
+            (ordinal_number, i, inventory_number) + worksheet_row[3:]
+        )
+    return list(process_rows(rows))
+
+def test_shards_keep_ordinal_number_groups():
+    """
+    No shard starts in the middle of an ordinal number group.
+    """
+    rows = make_rows(100)
+    shards = shard_rows(rows, 7)
+    assert [row for _, shard in shards for row in shard] == rows
+    for first, shard in shards:
+        assert shard[0] is rows[first - 1]
+        assert shard[0][0] is not None
+        if first > 1:
+            assert rows[first - 2][0] != shard[0][0]
+
+def test_parallel_validation_same_as_serial():
+    """
+    Validating rows in a process pool gives exactly the serial result.
+    """
+    rows = make_rows(100)
+    serial = select_fixed_asset_documents(rows)
+    assert select_fixed_asset_documents(rows, 3) == serial
+    assert len(serial) == 67
@@ -0,0 +1,53 @@
+from gzip import open as gzip_open
+
+from ..register import snapshots
+from ..register.functions import select_fixed_asset_documents
+from ..register.snapshots import (
+    diff_snapshots,
+    list_snapshots,
+    load_snapshot,
+    save_snapshot,
+)
+from .test_row_remapping import make_rows
+
+def test_snapshots_diff(tmp_path):
+    """
+    The second import adds two assets, removes one and modifies another.
+    Only the records changed are stored again.
+    """
+    documents = select_fixed_asset_documents(make_rows(3000))
+    first = save_snapshot(documents, tmp_path)
+
+    changed = [document.model_copy(deep=True) for document in documents[1:]]
+    changed[10].fixed_asset.value = '1.00'
+    changed += select_fixed_asset_documents(make_rows(3003)[-3:])
+    second = save_snapshot(changed, tmp_path)
+
+    assert list_snapshots(tmp_path) == [first, second]
+    added, removed, modified = diff_snapshots(first, second, tmp_path)
+    assert added == ['D111_1-003000', 'D111_1-003001']
+    assert removed == ['D111_1-000000']
+    assert modified == [
+        f'D111_1-{changed[10].document_name_serial}'
+    ]
+    assert diff_snapshots(second, second, tmp_path) == ([], [], [])
+
+    with gzip_open(tmp_path / 'records' / f'{second}.gz', 'rt') as stream:
+        assert len(stream.read().splitlines()) == 3
+    assert load_snapshot(second, tmp_path) == changed
+
+def test_few_chunks_written_after_removal(tmp_path, monkeypatch):
+    """
+    Removing a record near the top does not shift the chunks after it,
+    just the chunks holding the changes are written again.
+    """
+    monkeypatch.setattr(snapshots, 'CHUNK_SIZE', 32)
+    documents = select_fixed_asset_documents(make_rows(3000))
+    save_snapshot(documents, tmp_path)
+    chunks = set((tmp_path / 'chunks').iterdir())
+    assert len(chunks) > 20
+
+    changed = [document.model_copy(deep=True) for document in documents[1:]]
+    changed[1000].fixed_asset.value = '1.00'
+    save_snapshot(changed, tmp_path)
+    assert len(set((tmp_path / 'chunks').iterdir()) - chunks) <= 3
@@ -0,0 +1,79 @@
+from json import load
+
+import pytest
+
+from ..register import functions
+from ..register.functions import (
+    FILE_ERRORS,
+    select_documents_from_shard,
+    select_fixed_asset_documents,
+    write_error_report,
+)
+from .test_row_remapping import make_rows
+
+def make_rows_with_bad_dates() -> list[tuple]:
+    """
+    A few rows of the register get a date which cannot be parsed.
+    """
+    rows = []
+    for i, row in enumerate(make_rows(30)):
+        if i in {0, 10, 21}:
+            row = row[:3] + ('31st of June',) + row[4:]
+        rows.append(row)
+    return rows
+
+def test_all_errors_collected():
+    """
+    With collect_errors set, the valid rows make documents and the invalid
+    ones are reported with their row number and field-level errors.
+    """
+    documents, errors = select_documents_from_shard(
+        make_rows_with_bad_dates(), collect_errors=True
+    )
+    assert len(documents) == 17
+    assert [error['row'] for error in errors] == [2, 12, 23]
+    assert [error['ordinal_number'] for error in errors] == [1, 4, 8]
+    assert errors[0]['errors'][0]['field'] == 'date'
+    assert errors[0]['values']['date'] == '31st of June'
+
+def test_first_error_raised():
+    """
+    By default validation stops at the first invalid row.
+    """
+    try:
+        select_documents_from_shard(make_rows_with_bad_dates())
+    except RuntimeError as e:
+        assert 'ordinal_number 1' in str(e)
+    else:
+        assert False
+
+def test_error_report_written(tmp_path, monkeypatch):
+    """
+    The report is written both as text and json.
+    """
+    monkeypatch.chdir(tmp_path)
+    _, errors = select_documents_from_shard(
+        make_rows_with_bad_dates(), collect_errors=True
+    )
+    write_error_report(errors)
+    with open(f'{FILE_ERRORS}.json', encoding='utf-8') as stream:
+        assert [error['row'] for error in load(stream)] == [2, 12, 23]
+    with open(f'{FILE_ERRORS}.txt', encoding='utf-8') as stream:
+        assert stream.read().count('date: ') == 3
+
+def test_parallel_error_same_as_serial(monkeypatch):
+    """
+    With many processes the error reported is the first one in the sheet,
+    as in the serial run, not the one met first by any of the workers.
+    """
+    def exit_with_info(info):
+        raise SystemExit(info)
+
+    monkeypatch.setattr(functions, 'exit_with_info', exit_with_info)
+    rows = [
+        row[:3] + ('31st of June',) + row[4:] if i in {24, 60} else row
+        for i, row in enumerate(make_rows(90))
+    ]
+    for processes in (1, 3):
+        with pytest.raises(SystemExit, match='ordinal_number 9\\b'):
+            select_fixed_asset_documents(rows, processes)
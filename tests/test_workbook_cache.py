@@ -0,0 +1,98 @@
+import os
+
+import pytest
+from openpyxl.workbook.workbook import Workbook
+
+from ..register import cache, workbook
+from ..register.cache import (
+    cached_workbook,
+    load_cached_rows,
+    rows_cache_key,
+    save_cached_rows,
+)
+from ..register.workbook import iter_workbook_data, read_workbook_data
+from .test_memory_budget import make_register
+
+def test_workbook_copied_once(tmp_path, monkeypatch):
+    """
+    The workbook is copied on the first use only, then again
+    when the source changes or the copy gets damaged.
+    """
+    source = tmp_path / 'register.xlsx'
+    Workbook().save(source)
+
+    copies = []
+    copy = cache._copy  # pylint: disable=protected-access
+    monkeypatch.setattr(
+        cache, '_copy', lambda *args: copies.append(args) or copy(*args)
+    )
+
+    local = cached_workbook(source)
+    assert local.read_bytes() == source.read_bytes()
+    assert cached_workbook(source) == local
+    assert len(copies) == 1
+
+    os.utime(source, ns=(0, 0))
+    cached_workbook(source)
+    assert len(copies) == 2
+
+    local.write_bytes(b'x' * source.stat().st_size)
+    assert cached_workbook(source).read_bytes() == source.read_bytes()
+    assert len(copies) == 3
+
+def test_rows_read_from_sidecar(tmp_path, monkeypatch):
+    """
+    Rows of an unchanged workbook are read from the sidecar cache,
+    without openpyxl. Any change of the key means reading the workbook.
+    """
+    monkeypatch.setattr(cache, 'ROWS_CHUNK', 7)
+    make_register(tmp_path, 30)
+    monkeypatch.chdir(tmp_path)
+    rows = read_workbook_data()
+
+    def get_workbook(filename):
+        raise AssertionError(f'{filename} read again')
+
+    monkeypatch.setattr(workbook, 'get_workbook', get_workbook)
+    assert read_workbook_data() == rows
+    assert list(iter_workbook_data()) == rows
+
+    monkeypatch.setitem(workbook.INDEXES, 'id_vim', 0)
+    try:
+        read_workbook_data()
+    except AssertionError:
+        pass
+    else:
+        assert False
+
+@pytest.mark.skipif(
+    not hasattr(os, 'geteuid') or os.geteuid() != 0,
+    reason='only root can give the directory away',
+)
+def test_cache_of_someone_else_not_used(tmp_path, monkeypatch):
+    """
+    Rows planted in a cache directory owned by someone else are not loaded,
+    and nothing is cached there.
+    """
+    make_register(tmp_path, 3)
+    key = rows_cache_key(tmp_path / 'register.xlsx', 'Środki Trwałe', 16, {})
+    save_cached_rows(key, [('planted',)])
+    assert load_cached_rows(key) == [('planted',)]
+
+    os.chown(tmp_path / 'cache', 12345, 12345)
+    assert load_cached_rows(key) is None
+    with pytest.raises(PermissionError):
+        cached_workbook(tmp_path / 'register.xlsx')
+
+def test_workbook_opened_if_not_copied(tmp_path, monkeypatch):
+    """
+    A workbook which cannot be copied is opened where it is.
+    """
+    make_register(tmp_path, 3)
+    monkeypatch.chdir(tmp_path)
+
+    def copy(source, target):
+        raise PermissionError(f'{target} cannot be written')
+
+    monkeypatch.setattr(cache, '_copy', copy)
+    assert len(read_workbook_data()) == 3